@@ -4,22 +4,27 @@ Direct Chrome Cookie Extractor for Stealth Browser Skill
 Extracts cookies directly from Chrome's SQLite database, including HttpOnly cookies.
 
 This bypasses the FGP limitation and can access ALL cookies.
-Requires Chrome to be closed (or uses a copy of the database).
+Reads the database in place while Chrome is running (or falls back to a copy).
 """
 
 import argparse
-import base64
+import hashlib
 import json
-import os
+import re
 import shutil
 import sqlite3
 import subprocess
 import sys
 import tempfile
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # Chrome paths on macOS
 CHROME_COOKIE_PATH = Path.home() / "Library/Application Support/Google/Chrome/Default/Cookies"
@@ -28,6 +33,57 @@ CHROME_LOCAL_STATE = Path.home() / "Library/Application Support/Google/Chrome/Lo
 # Cache for encryption key (avoids repeated Keychain prompts)
 KEY_CACHE_FILE = Path(__file__).parent.parent / "data" / ".chrome_key_cache"
 
+# In-process copy of the key so repeated extractions skip the disk and Keychain
+_encryption_key: Optional[bytes] = None
+
+# Microseconds between the Chrome (1601) and Unix (1970) epochs
+CHROME_EPOCH_OFFSET_US = 11644473600 * 1000000
+
+# Chrome encrypts cookie values with AES-128-CBC and a fixed IV on macOS
+CHROME_IV = b' ' * 16
+_CHROME_IV_INT = int.from_bytes(CHROME_IV, 'big')
+
+# Cookies for one domain: exact domain, wildcard domain, and subdomains.
+# Expiry is converted to Unix time (see chrome_timestamp_to_unix) and samesite
+# to its name (-1 is unset) by SQLite. GLOB is case-sensitive, which is fine
+# because Chrome stores host keys in lowercase.
+COOKIES_QUERY = f"""
+    SELECT host_key, name, value, encrypted_value, path,
+           CASE WHEN expires_utc
+                THEN (expires_utc - {CHROME_EPOCH_OFFSET_US}) / 1000000.0
+           END,
+           is_secure, is_httponly,
+           CASE samesite WHEN 0 THEN 'None' WHEN 1 THEN 'Lax' WHEN 2 THEN 'Strict' END
+    FROM cookies
+    WHERE host_key = ? OR host_key = ? OR host_key GLOB ?
+"""
+
+# cryptography cipher classes, loaded on first decrypt (see _new_decryptor)
+_Cipher = _algorithms = _modes = None
+
+# Patterns used to recover cookie values from decrypted plaintext.
+# Each alternative is a lookahead scanning the whole text, so the first
+# alternative that matches anywhere wins, in the same priority order as
+# separate searches but in a single call.
+_VALUE_RE = re.compile(
+    r'(?s)'
+    # JWE/JWT tokens (start with eyJ)
+    r'(?=.*?(?P<jwt>eyJ[a-zA-Z0-9_-]+(?:\.[a-zA-Z0-9_-]*)*))'
+    # Hex strings (auth tokens): continuous hex
+    r'|(?=.*?(?P<hex>[a-f0-9]{32,}))'
+    # URL-encoded values (start with v1%3A or similar)
+    r'|(?=.*?(?P<url>v1%[0-9A-F]{2}[a-zA-Z0-9%_.-]+))'
+    # Quoted strings (like "HBISAAA=")
+    r'|(?=.*?(?P<quoted>"[^"]+"))'
+    # Simple short values (like "en", "2", "1"): a clean alphanumeric start
+    # within the first 16 chars whose first 20 chars (ignoring trailing
+    # NULs/whitespace) are all alnum or '._-=%:'. Captures the rest of text.
+    r'|(?=.{0,15}?(?P<clean>[^\W_](?=[\w.\-=%:]{19}|[\w.\-=%:]{0,18}\s*\x00*\Z).*))'
+    # Base64-style strings
+    r'|(?=.*?(?P<b64>[A-Za-z0-9+/=_-]{20,}))'
+)
+_FALLBACK_RE = re.compile(r'[a-zA-Z0-9_\-=.%:]{5,}')
+
 
 def get_chrome_encryption_key() -> Optional[bytes]:
     """
@@ -35,13 +91,17 @@ def get_chrome_encryption_key() -> Optional[bytes]:
     Chrome stores cookie values encrypted with this key.
     Caches the derived key to avoid repeated Keychain password prompts.
     """
-    import hashlib
+    global _encryption_key
+
+    if _encryption_key is not None:
+        return _encryption_key
 
     # Try to load cached key first
     if KEY_CACHE_FILE.exists():
         try:
             cached_key = KEY_CACHE_FILE.read_bytes()
             if len(cached_key) == 16:  # Valid AES-128 key
+                _encryption_key = cached_key
                 return cached_key
         except Exception:
             pass
@@ -77,6 +137,7 @@ def get_chrome_encryption_key() -> Optional[bytes]:
         except Exception:
             pass  # Non-fatal if caching fails
 
+        _encryption_key = key
         return key
 
     except Exception as e:
@@ -84,77 +145,109 @@ def get_chrome_encryption_key() -> Optional[bytes]:
         return None
 
 
-def decrypt_cookie_value(encrypted_value: bytes, key: bytes) -> str:
-    """Decrypt a Chrome cookie value"""
-    try:
-        from Crypto.Cipher import AES
-        import re
+def _new_decryptor(key: bytes):
+    """
+    Create an AES-CBC decryptor with Chrome's fixed IV.
+    cryptography is imported on first use so commands that never decrypt
+    (e.g. --clear-cache, --no-decrypt) don't pay for loading OpenSSL.
+    """
+    global _Cipher, _algorithms, _modes
 
-        # Chrome prepends 'v10' or 'v11' to encrypted values
-        if encrypted_value[:3] == b'v10' or encrypted_value[:3] == b'v11':
+    if _Cipher is None:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        _Cipher, _algorithms, _modes = Cipher, algorithms, modes
+
+    return _Cipher(_algorithms.AES(key), _modes.CBC(CHROME_IV)).decryptor()
+
+
+def decrypt_cookie_values(encrypted_values: list[bytes], key: bytes) -> list[str]:
+    """
+    Decrypt a batch of Chrome cookie values with a single AES pass.
+
+    All ciphertexts are concatenated and decrypted in one call. CBC decryption
+    only chains across the boundary between two values, so the first block of
+    each value after the first is repaired by XOR-ing out the previous
+    ciphertext block and XOR-ing in Chrome's fixed IV.
+    """
+    # Chrome prepends 'v10' or 'v11' to encrypted values
+    blobs = []
+    for encrypted_value in encrypted_values:
+        if encrypted_value.startswith((b'v10', b'v11')):
             encrypted_value = encrypted_value[3:]
+        blobs.append(encrypted_value)
+
+    # Only whole, non-empty AES blocks can be decrypted
+    batch = [blob for blob in blobs if blob and len(blob) % 16 == 0]
+    if not batch:
+        return [""] * len(encrypted_values)
+
+    try:
+        ciphertext = b''.join(batch)
+        decryptor = _new_decryptor(key)
+        plaintext = bytearray(decryptor.update(ciphertext) + decryptor.finalize())
+    except ImportError:
+        print("Warning: cryptography not installed, cannot decrypt cookies", file=sys.stderr)
+        return [""] * len(encrypted_values)
+    except Exception:
+        return [""] * len(encrypted_values)
+
+    # Repair the first block of every value after the first in place, then
+    # hand out zero-copy views so each value is only copied when decoded
+    offset = len(batch[0])
+    for blob in batch[1:]:
+        first_block = (
+            int.from_bytes(plaintext[offset:offset + 16], 'big')
+            ^ int.from_bytes(ciphertext[offset - 16:offset], 'big')
+            ^ _CHROME_IV_INT
+        )
+        plaintext[offset:offset + 16] = first_block.to_bytes(16, 'big')
+        offset += len(blob)
+
+    view = memoryview(plaintext)
+    results = []
+    offset = 0
+    for blob in blobs:
+        if not blob or len(blob) % 16:
+            results.append("")
+            continue
+        results.append(_extract_cookie_text(view[offset:offset + len(blob)]))
+        offset += len(blob)
+
+    return results
+
+
+def decrypt_cookie_value(encrypted_value: bytes, key: bytes) -> str:
+    """Decrypt a Chrome cookie value"""
+    return decrypt_cookie_values([encrypted_value], key)[0]
 
-        # Use AES-CBC with a fixed IV (Chrome's method on macOS)
-        iv = b' ' * 16
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        decrypted = cipher.decrypt(encrypted_value)
 
+def _extract_cookie_text(decrypted) -> str:
+    """Recover the cookie value from decrypted plaintext (bytes or memoryview)"""
+    try:
         # Remove PKCS7 padding
         padding_len = decrypted[-1]
         if isinstance(padding_len, int) and padding_len <= 16:
             decrypted = decrypted[:-padding_len]
 
         # The first block (16 bytes) is corrupted due to IV mismatch
-        text = decrypted.decode('utf-8', errors='ignore')
-
-        # For JWE/JWT tokens (start with eyJ)
-        jwt_match = re.search(r'eyJ[a-zA-Z0-9_-]+(?:\.[a-zA-Z0-9_-]*)*', text)
-        if jwt_match:
-            return jwt_match.group(0)
-
-        # Common cookie patterns after garbage bytes:
-        # 1. Hex strings (auth tokens): find continuous hex
-        hex_match = re.search(r'[a-f0-9]{32,}', text)
-        if hex_match:
-            return hex_match.group(0)
-
-        # 2. URL-encoded values (start with v1%3A or similar)
-        url_match = re.search(r'v1%[0-9A-F]{2}[a-zA-Z0-9%_.-]+', text)
-        if url_match:
-            return url_match.group(0)
-
-        # 3. Quoted strings (like "HBISAAA=")
-        quoted_match = re.search(r'"([^"]+)"', text)
-        if quoted_match:
-            return quoted_match.group(0)
-
-        # 4. Simple short values (like "en", "2", "1")
-        # Find where clean alphanumeric starts after garbage
-        for i in range(min(16, len(text))):
-            rest = text[i:]
-            # Check if this is a clean start (alnum or common chars)
-            if rest and rest[0].isalnum():
-                # Verify it's not just more garbage
-                clean = rest.rstrip('\x00').strip()
-                if clean and all(c.isalnum() or c in '._-=%:' for c in clean[:20]):
-                    return clean
-
-        # 5. Base64-style strings
-        b64_match = re.search(r'[A-Za-z0-9+/=_-]{20,}', text)
-        if b64_match:
-            return b64_match.group(0)
+        text = str(decrypted, 'utf-8', 'ignore')
+
+        # JWTs, hex tokens, URL-encoded values, quoted strings, clean short
+        # values and base64-style strings, in that order of preference
+        value_match = _VALUE_RE.match(text)
+        if value_match:
+            if value_match.lastgroup == 'clean':
+                return value_match.group('clean').rstrip('\x00').strip()
+            return value_match.group(value_match.lastgroup)
 
         # Fallback: find longest reasonable string
-        matches = re.findall(r'[a-zA-Z0-9_\-=.%:]{5,}', text)
+        matches = _FALLBACK_RE.findall(text)
         if matches:
             return max(matches, key=len)
 
         return text.strip('\x00').strip()
 
-    except ImportError:
-        print("Warning: pycryptodome not installed, cannot decrypt cookies", file=sys.stderr)
-        return ""
-    except Exception as e:
+    except Exception:
         return ""
 
 
@@ -165,7 +258,90 @@ def chrome_timestamp_to_unix(chrome_ts: int) -> float:
     # Chrome epoch is Jan 1, 1601
     # Unix epoch is Jan 1, 1970
     # Difference is 11644473600 seconds
-    return (chrome_ts / 1000000) - 11644473600
+    # Subtract in integer microseconds first so the result is rounded once
+    return (chrome_ts - CHROME_EPOCH_OFFSET_US) / 1000000
+
+
+def _escape_glob(text: str) -> str:
+    """Escape GLOB wildcards so a domain only matches itself"""
+    return text.replace("[", "[[]").replace("*", "[*]").replace("?", "[?]")
+
+
+def _covering_domains(domains: list[str]) -> list[str]:
+    """
+    Normalize domains and drop any that are covered by another requested domain
+    (e.g. accounts.x.ai when x.ai is requested), so each cookie matches only
+    one of the remaining domains and per-domain queries never overlap.
+    """
+    # Remove leading dot if present; Chrome stores host keys in lowercase
+    cleaned = list(dict.fromkeys(domain.lstrip(".").lower() for domain in domains))
+    return [
+        domain for domain in cleaned
+        if not any(domain.endswith(f".{other}") for other in cleaned)
+    ]
+
+
+def _query_cookies(db_uri: str, domains: list[str], collect_encrypted: bool) -> tuple[list, list]:
+    """
+    Query cookies for the given domains from a cookie database.
+
+    Returns:
+        tuple: (cookies, encrypted) where encrypted holds
+        (cookie index, encrypted value) pairs still to be decrypted
+    """
+    conn = sqlite3.connect(db_uri, uri=True)
+    try:
+        # Read-only scan: map the file instead of read()-ing it page by page
+        # and give the index pages room in the cache
+        conn.execute("PRAGMA mmap_size = 268435456")  # 256MB
+        conn.execute("PRAGMA cache_size = -65536")  # 64MB
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA query_only = 1")
+
+        cursor = conn.cursor()
+
+        # Stream rows straight from the cursor instead of materialising them
+        # with fetchall()
+        cookies = []
+        append = cookies.append
+        encrypted = []  # (cookie index, encrypted value) pairs to decrypt in one batch
+        for domain in _covering_domains(domains):
+            # Same SQL text every time, so sqlite3 prepares it once and
+            # reuses the cached statement for each domain
+            cursor.execute(COOKIES_QUERY, (domain, f".{domain}", f"*.{_escape_glob(domain)}"))
+            for host_key, name, value, encrypted_value, path, expires, is_secure, is_httponly, same_site in cursor:
+                if encrypted_value and collect_encrypted:
+                    encrypted.append((len(cookies), encrypted_value))
+
+                append({
+                    "name": name,
+                    "value": value,
+                    "domain": host_key,
+                    "path": path,
+                    "expires": expires,
+                    "secure": bool(is_secure),
+                    "http_only": bool(is_httponly),
+                    "same_site": same_site
+                })
+
+        return cookies, encrypted
+    finally:
+        conn.close()
+
+
+def _query_cookies_from_copy(domains: list[str], collect_encrypted: bool) -> tuple[list, list]:
+    """Query a temporary copy of the cookie database (Chrome may have it locked)"""
+    temp_dir = tempfile.mkdtemp()
+    temp_db = Path(temp_dir) / "Cookies"
+
+    try:
+        # Data only: the copy is throwaway, so skip copy2's metadata syscalls.
+        # copyfile uses fcopyfile/sendfile fast paths where available.
+        shutil.copyfile(CHROME_COOKIE_PATH, temp_db)
+        return _query_cookies(temp_db.as_uri(), domains, collect_encrypted)
+    finally:
+        # Cleanup temp files
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 def extract_cookies(domains: list[str], decrypt: bool = True) -> dict:
@@ -185,67 +361,33 @@ def extract_cookies(domains: list[str], decrypt: bool = True) -> dict:
             "error": f"Chrome cookie database not found at {CHROME_COOKIE_PATH}"
         }
 
-    # Get encryption key if decrypting
-    key = None
+    # Get encryption key if decrypting. On a cold cache this waits on the
+    # Keychain, so look it up in a worker thread while the database is read.
+    key_lookup = None
     if decrypt:
-        key = get_chrome_encryption_key()
-
-    # Copy database to temp file (Chrome may have it locked)
-    temp_dir = tempfile.mkdtemp()
-    temp_db = Path(temp_dir) / "Cookies"
+        key_lookup = ThreadPoolExecutor(max_workers=1)
+        key_future = key_lookup.submit(get_chrome_encryption_key)
 
     try:
-        shutil.copy2(CHROME_COOKIE_PATH, temp_db)
-
-        conn = sqlite3.connect(str(temp_db))
-        cursor = conn.cursor()
-
-        # Build domain filter - exact matches and subdomains
-        domain_conditions = []
-        for domain in domains:
-            # Remove leading dot if present
-            clean_domain = domain.lstrip(".")
-            # Match: exact domain, wildcard domain, and subdomains
-            domain_conditions.append(f"host_key = '{clean_domain}'")
-            domain_conditions.append(f"host_key = '.{clean_domain}'")
-            domain_conditions.append(f"host_key LIKE '%.{clean_domain}'")
-
-        where_clause = " OR ".join(domain_conditions)
-
-        cursor.execute(f"""
-            SELECT host_key, name, value, encrypted_value, path,
-                   expires_utc, is_secure, is_httponly, samesite
-            FROM cookies
-            WHERE {where_clause}
-        """)
-
-        cookies = []
-        for row in cursor.fetchall():
-            host_key, name, value, encrypted_value, path, expires_utc, is_secure, is_httponly, samesite = row
-
-            # Decrypt value if needed
-            cookie_value = value
-            if encrypted_value and key:
-                decrypted = decrypt_cookie_value(encrypted_value, key)
-                if decrypted:
-                    cookie_value = decrypted
-
-            # Convert samesite
-            samesite_map = {-1: None, 0: "None", 1: "Lax", 2: "Strict"}
-            same_site = samesite_map.get(samesite)
-
-            cookies.append({
-                "name": name,
-                "value": cookie_value,
-                "domain": host_key,
-                "path": path,
-                "expires": chrome_timestamp_to_unix(expires_utc) if expires_utc else None,
-                "secure": bool(is_secure),
-                "http_only": bool(is_httponly),
-                "same_site": same_site
-            })
-
-        conn.close()
+        try:
+            # Read the live database in place. immutable=1 tells SQLite the file
+            # won't change, so it takes no locks and works while Chrome has it
+            # open - no copy needed. Writes in flight are not seen.
+            cookies, encrypted = _query_cookies(
+                f"{CHROME_COOKIE_PATH.as_uri()}?mode=ro&immutable=1", domains, decrypt
+            )
+        except sqlite3.DatabaseError:
+            # Unreadable in place (e.g. caught mid-write): query a copy instead
+            cookies, encrypted = _query_cookies_from_copy(domains, decrypt)
+
+        key = key_future.result() if key_lookup else None
+
+        # Decrypt values if needed
+        if encrypted and key:
+            decrypted = decrypt_cookie_values([ev for _, ev in encrypted], key)
+            for (idx, _), cookie_value in zip(encrypted, decrypted):
+                if cookie_value:
+                    cookies[idx]["value"] = cookie_value
 
         return {
             "success": True,
@@ -266,8 +408,15 @@ def extract_cookies(domains: list[str], decrypt: bool = True) -> dict:
             "error": str(e)
         }
     finally:
-        # Cleanup temp files
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        if key_lookup:
+            key_lookup.shutdown(wait=False)
+
+
+def _dumps(obj) -> bytes:
+    """Serialize to indented JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
 
 
 def main():
@@ -302,11 +451,10 @@ def main():
     if args.save and result.get("success"):
         save_path = Path(args.save)
         save_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(save_path, 'w') as f:
-            json.dump(result, f, indent=2)
+        save_path.write_bytes(_dumps(result))
         result["saved_to"] = str(save_path)
 
-    print(json.dumps(result, indent=2))
+    sys.stdout.buffer.write(_dumps(result) + b"\n")
     sys.exit(0 if result.get("success") else 1)
 
 
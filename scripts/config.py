@@ -5,26 +5,35 @@ Configuration for Grok CLI skill
 
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables (skip importing dotenv when there is no .env)
 SKILL_DIR = Path(__file__).parent.parent
-load_dotenv(SKILL_DIR / ".env")
+ENV_FILE = SKILL_DIR / ".env"
+if ENV_FILE.is_file():
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
 
 # Data directories
 DATA_DIR = SKILL_DIR / "data"
 SCREENSHOTS_DIR = DATA_DIR / "screenshots"
 USER_DATA_DIR = DATA_DIR / "browser_profile"
 
-# Create directories
-DATA_DIR.mkdir(exist_ok=True)
-SCREENSHOTS_DIR.mkdir(exist_ok=True)
-USER_DATA_DIR.mkdir(exist_ok=True)
+# Browser daemon (grokd.py / `grok.py --serve`): socket, PID and log files
+GROK_SOCKET = DATA_DIR / "grok.sock"
+GROKD_PID_FILE = DATA_DIR / "grokd.pid"
+GROKD_LOG_FILE = DATA_DIR / "grokd.log"
+
+# Create directories (DATA_DIR is created as their parent)
+SCREENSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 # Browser settings
 HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
 DEFAULT_TIMEOUT = int(os.getenv("DEFAULT_TIMEOUT", "60"))
 
+# Reuse cookies already injected into a browser profile for this long (seconds)
+COOKIE_SNAPSHOT_TTL = int(os.getenv("COOKIE_SNAPSHOT_TTL", "3600"))
+
 # Browser args for stealth
 BROWSER_ARGS = [
     "--disable-blink-features=AutomationControlled",
@@ -32,13 +41,28 @@ BROWSER_ARGS = [
     "--no-default-browser-check",
 ]
 
+# Added in headless mode: nothing is shown, so skip GPU/canvas work, keep
+# the hidden renderer from being throttled, and don't load images (Grok's
+# answers are read as text)
+HEADLESS_PERF_ARGS = [
+    "--disable-gpu",
+    "--disable-accelerated-2d-canvas",
+    "--disable-canvas-aa",
+    "--disable-gl-drawing-for-tests",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--mute-audio",
+    "--disable-dev-shm-usage",
+    "--blink-settings=imagesEnabled=false",
+]
+
 # Grok URLs
 GROK_URL_XCOM = "https://x.com/i/grok"
 GROK_URL_STANDALONE = "https://grok.com"
 GROK_URL = GROK_URL_STANDALONE  # Default to standalone (different rate limits)
 
 # Input field selectors for both grok.com and x.com/i/grok
-GROK_INPUT_SELECTORS = [
+GROK_INPUT_SELECTORS = (
     # grok.com standalone site
     'textarea[aria-label="Ask Grok anything"]',
     'textarea[aria-label*="Ask Grok"]',
@@ -48,21 +72,24 @@ GROK_INPUT_SELECTORS = [
     'div[contenteditable="true"][data-placeholder*="What do you want"]',
     'div[role="textbox"][data-placeholder]',
     'textarea[placeholder*="Ask"]',
-]
+)
 
 # Send button
-GROK_SEND_SELECTORS = [
+GROK_SEND_SELECTORS = (
     'button[data-testid="grokSendButton"]',
     'button[aria-label="Send"]',
     'div[data-testid="grokInput"] ~ button',
-]
+)
 
 # Response container
-GROK_RESPONSE_SELECTORS = [
+GROK_RESPONSE_SELECTORS = (
     'div[data-testid="grokResponse"]',
     'div[data-testid="messageContent"]',
     'div.message-content',
-]
+)
+
+# Shown while a response is still streaming (stop button / loading state)
+GROK_STREAMING_SELECTOR = "[data-state='loading'], [aria-label='Stop generating']"
 
 # Available Grok models
 GROK_MODELS = {
@@ -4,165 +4,632 @@ Grok CLI - Send prompts to Grok and get responses
 Uses stealth browser with Chrome auth for authentication
 """
 
-import asyncio
 import argparse
+import asyncio
+import functools
 import json
+import os
 import re
 import sys
+import tempfile
+import threading
 import time
 from pathlib import Path
 
-import nodriver as uc
-from nodriver import cdp
+
+@functools.lru_cache(maxsize=None)
+def _token_encoder():
+    """tiktoken's cl100k_base encoding, or None if tiktoken isn't usable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
 
 
 def estimate_tokens(text: str) -> int:
     """
     Estimate token count for Claude/GPT models.
-    Uses ~4 chars per token heuristic (accurate within 10-20% for English).
+    Counts with tiktoken (cl100k_base) when it is installed; otherwise
+    uses ~4 chars per token heuristic (accurate within 10-20% for English,
+    often further off for code).
     """
     if not text:
         return 0
+    encoder = _token_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
     # More accurate: count words and apply 0.75 multiplier, or chars/4
-    # Using char-based as it handles code/punctuation better
-    return max(1, len(text) // 4)
+    # Using char-based as it handles code/punctuation better; rounds up,
+    # so any non-empty text is at least 1 token
+    return (len(text) + 3) >> 2
 
 from config import (
-    HEADLESS, USER_DATA_DIR, BROWSER_ARGS, DEFAULT_TIMEOUT,
-    GROK_URL, GROK_URL_XCOM, GROK_URL_STANDALONE,
-    GROK_INPUT_SELECTORS, GROK_SEND_SELECTORS, GROK_RESPONSE_SELECTORS,
-    GROK_MODELS, DEFAULT_MODEL
+    HEADLESS, DATA_DIR, USER_DATA_DIR, BROWSER_ARGS, HEADLESS_PERF_ARGS, DEFAULT_TIMEOUT,
+    GROK_URL, GROK_URL_XCOM,
+    GROK_INPUT_SELECTORS, GROK_SEND_SELECTORS,
+    GROK_STREAMING_SELECTOR,
+    GROK_MODELS, DEFAULT_MODEL, COOKIE_SNAPSHOT_TTL, GROK_SOCKET
 )
-from chrome_cookies import extract_cookies as extract_chrome_cookies
 
+# nodriver (and its CDP bindings) is imported on first use by
+# _load_nodriver() so --help and argument errors don't pay for it
+uc = cdp = None
+
+# Chrome's samesite names mapped to CDP enum members (set on load)
+_SAME_SITE = None
+
+# Cookie domain suffixes, dot-prefixed so "x.com" doesn't match "notx.com"
+X_SUFFIXES = (".x.com", ".twitter.com")
+GROK_SUFFIXES = (".grok.com", ".x.ai")
+
+
+def _load_nodriver():
+    """Import nodriver into the module globals uc/cdp if not done yet."""
+    global uc, cdp, _SAME_SITE
 
-async def handle_grok_auth(page, browser, cookies):
+    if uc is None:
+        import nodriver
+        from nodriver import cdp as nodriver_cdp
+        uc, cdp = nodriver, nodriver_cdp
+        _SAME_SITE = {s.value: s for s in cdp.network.CookieSameSite}
+
+
+def _cookie_param(c: dict) -> "cdp.network.CookieParam":
+    """Build a CDP CookieParam from an extracted Chrome cookie."""
+    return cdp.network.CookieParam(
+        name=c["name"],
+        value=c["value"],
+        domain=c.get("domain"),
+        path=c.get("path", "/"),
+        secure=c.get("secure", False),
+        http_only=c.get("http_only", False),
+        same_site=_SAME_SITE.get(c.get("same_site")),
+    )
+
+
+def classify_cookies(cookies) -> dict:
     """
-    Handle grok.com OAuth flow via X.com sign-in.
+    Sort cookies into X.com and grok.com/x.ai buckets in one pass.
 
     Returns:
-        tuple: (page, success, error_message)
+        dict: {"x": [CookieParam], "grok": [CookieParam]}
     """
-    # Check current URL
-    current_url = page.url
-
-    # First, inject X.com cookies (needed for OAuth)
+    _load_nodriver()
+    buckets = {"x": [], "grok": []}
     for c in cookies:
         if not c.get("value"):
             continue
-        cookie_domain = c.get("domain", "").lstrip(".")
-        if not any(d in cookie_domain for d in ["x.com", "twitter.com"]):
+        cookie_domain = "." + c.get("domain", "").lstrip(".")
+        if cookie_domain.endswith(X_SUFFIXES):
+            bucket = buckets["x"]
+        elif cookie_domain.endswith(GROK_SUFFIXES):
+            bucket = buckets["grok"]
+        else:
             continue
         try:
-            same_site = None
-            if c.get("same_site") in ["Strict", "Lax", "None"]:
-                same_site = cdp.network.CookieSameSite(c["same_site"])
-            param = cdp.network.CookieParam(
-                name=c["name"],
-                value=c["value"],
-                domain=c.get("domain"),
-                path=c.get("path", "/"),
-                secure=c.get("secure", False),
-                http_only=c.get("http_only", False),
-                same_site=same_site,
-            )
+            bucket.append(_cookie_param(c))
+        except Exception:
+            pass
+    return buckets
+
+
+async def inject_cookies(browser, params) -> int:
+    """
+    Inject CookieParams in one CDP call.
+
+    Falls back to one call per cookie if the batch is rejected, so a
+    single malformed cookie doesn't block the rest.
+
+    Returns:
+        int: number of cookies injected
+    """
+    if not params:
+        return 0
+
+    try:
+        await browser.connection.send(cdp.storage.set_cookies(params))
+        return len(params)
+    except Exception:
+        pass
+
+    injected = 0
+    for param in params:
+        try:
             await browser.connection.send(cdp.storage.set_cookies([param]))
+            injected += 1
         except Exception:
             pass
+    return injected
 
-    # Check if we're on grok.com and need to sign in
-    if "grok.com" in current_url and "sign-in" not in current_url:
-        # Check if there's a sign-in button in header (indicates not logged in)
-        needs_signin = await page.evaluate('''() => {
-            // Check header for sign-in button
-            const allElements = document.querySelectorAll('button, a');
-            for (const el of allElements) {
-                const text = (el.innerText || el.textContent || '').trim();
-                // Header buttons will have text "Sign in"
-                if (text === 'Sign in') {
-                    return true;
+
+# Running browsers keyed by (headless, profile dir); see _get_or_start_browser
+_BROWSER_POOL: dict = {}
+_BROWSER_POOL_LOCK = None
+_BROWSER_POOL_LOOP = None
+
+
+async def _get_or_start_browser(headless: bool, browser_profile: Path):
+    """
+    Return a running browser for this profile, starting one if needed.
+
+    Browsers are bound to the event loop that started them, so the pool
+    is reset when called from a different loop.
+    """
+    global _BROWSER_POOL_LOCK, _BROWSER_POOL_LOOP
+
+    _load_nodriver()
+    loop = asyncio.get_running_loop()
+    if _BROWSER_POOL_LOOP is not loop:
+        _BROWSER_POOL.clear()
+        _BROWSER_POOL_LOCK = asyncio.Lock()
+        _BROWSER_POOL_LOOP = loop
+
+    key = (headless, str(browser_profile))
+    async with _BROWSER_POOL_LOCK:
+        browser = _BROWSER_POOL.get(key)
+        if browser is None or browser.stopped:
+            browser = await uc.start(
+                headless=headless,
+                user_data_dir=str(browser_profile),
+                browser_args=BROWSER_ARGS + (HEADLESS_PERF_ARGS if headless else [])
+            )
+            _BROWSER_POOL[key] = browser
+    return browser
+
+
+def close_browsers():
+    """Stop every worker and pooled browser. Call before the event loop exits."""
+    for workers in _WORKERS.values():
+        for worker in workers:
+            worker.cancel()
+    _WORKERS.clear()
+    for browser in _BROWSER_POOL.values():
+        try:
+            browser.stop()
+        except Exception:
+            pass
+    _BROWSER_POOL.clear()
+
+
+# All known input selectors as one selector list, matched in a single query
+_INPUT_SELECTOR = ", ".join(GROK_INPUT_SELECTORS)
+
+# Resolves true once the selector matches, or false after the given number
+# of ms. A MutationObserver re-checks on DOM changes, so the wait is awaited
+# in the page instead of polled over CDP. Called with (selector, ms).
+_SELECTOR_JS = '''((selector, ms) => new Promise(resolve => {
+    if (document.querySelector(selector)) return resolve(true);
+    const done = (found) => { observer.disconnect(); clearTimeout(timer); resolve(found); };
+    const observer = new MutationObserver(() => { if (document.querySelector(selector)) done(true); });
+    const timer = setTimeout(() => done(false), ms);
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+}))'''
+
+# Enabled submit/send buttons for grok.com and x.com/i/grok, as one selector list
+_SUBMIT_SELECTOR = ", ".join(
+    f"{sel}:not([disabled])"
+    for sel in ('button[aria-label="Submit"]', 'button[type="submit"]') + GROK_SEND_SELECTORS
+)
+# Click the first enabled submit button; false if there is none
+_CLICK_SUBMIT_JS = f"(el => el ? (el.click(), true) : false)(document.querySelector({json.dumps(_SUBMIT_SELECTOR)}))"
+
+# Current text of the input tagged by _BOOTSTRAP_JS
+_INPUT_TEXT_JS = "(el => el ? (el.value ?? el.innerText ?? '') : '')(document.querySelector('[data-grok-cli-input]'))"
+
+# Fallback for editors that ignore Input.insertText. Uses the native value
+# setter so React notices the change. Called with the prompt text.
+_SET_INPUT_JS = '''((text) => {
+    const el = document.querySelector('[data-grok-cli-input]');
+    if (!el) return false;
+    if (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT') {
+        const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, text);
+    } else {
+        el.textContent = text;
+    }
+    el.dispatchEvent(new InputEvent('input', {bubbles: true, data: text, inputType: 'insertText'}));
+    return true;
+})'''
+
+# Sign-in and OAuth helpers, installed as window.__grok in every document of
+# a Grok tab by _install_helpers() so calls only ship a short expression
+_HELPERS_JS = '''window.__grok = {
+    buttonText(el) {
+        return (el.innerText || el.textContent || '').trim();
+    },
+    // A "Sign in" button in the header means we're not logged in
+    needsSignin() {
+        return [...document.querySelectorAll('button, a')].some(el => this.buttonText(el) === 'Sign in');
+    },
+    clickSignIn() {
+        for (const el of document.querySelectorAll('button, a')) {
+            if (this.buttonText(el) === 'Sign in') {
+                el.click();
+                return true;
+            }
+        }
+        return false;
+    },
+    // "Sign in with X" / "Continue with X" on accounts.x.ai, else an X logo button
+    clickXSignIn() {
+        for (const btn of document.querySelectorAll('button, a')) {
+            const text = btn.innerText || btn.textContent || '';
+            if (text.includes('Sign in with X') || text.includes('Continue with X') ||
+                text.includes('Sign in with 𝕏') || text.includes('Continue with 𝕏')) {
+                btn.click();
+                return true;
+            }
+        }
+        for (const btn of document.querySelectorAll('[aria-label*="X"], [aria-label*="Twitter"]')) {
+            if (btn.tagName === 'BUTTON' || btn.tagName === 'A') {
+                btn.click();
+                return true;
+            }
+        }
+        return false;
+    },
+    // Click the first button whose text contains any of the given words
+    clickButtonWith(words) {
+        for (const btn of document.querySelectorAll('button, input[type="submit"]')) {
+            const text = (btn.innerText || btn.value || '').toLowerCase();
+            if (words.some(word => text.includes(word))) {
+                btn.click();
+                return true;
+            }
+        }
+        return false;
+    }
+};'''
+
+# Button words that approve the OAuth consent screen
+_AUTHORIZE_WORDS = ["authorize", "allow", "continue"]
+
+# Error phrases shown by Grok/Cloudflare, mapped to the result flag they set
+_ERROR_CATEGORIES = {
+    "reached your limit": "rate_limited",
+    "limit of": "rate_limited",
+    "heavy usage": "capacity_limited",
+    "try again soon": "capacity_limited",
+    "verify you are human": "cloudflare_blocked",
+    "cloudflare": "cloudflare_blocked",
+}
+# Plain words only, so the pattern is valid in both Python and JS
+_ERROR_RE = re.compile("|".join(_ERROR_CATEGORIES), re.I)
+
+
+def _error_categories(phrases) -> set:
+    """Map matched error phrases (any case) to their categories."""
+    return {_ERROR_CATEGORIES[p.lower()] for p in phrases}
+
+
+# Response line filters (see _ask_grok)
+_SPEED_WORDS = frozenset({'fast', 'slow', 'medium'})
+_ACTION_LINES = frozenset({'Copy', 'Share', 'Like', 'Dislike', 'Think Harder', '...'})
+_SUGGESTION_FIRST_WORDS = frozenset({
+    'Famous', 'Other', 'More', 'Tell', 'Show', 'List', 'Give', 'Explain', 'What',
+    'How', 'Why', 'When', 'Where', 'Who', 'Compare', 'Explore', 'Make', 'Learn',
+})
+# The response ends at the first (stripped) line that fully matches one of:
+# timing info (grok.com shows "XXXms", "X.Xs", "Fast/Slow" or "989ms Fast"),
+# an action button, a follow-up suggestion arrow, or a suggestion of up to
+# 6 words starting with one of _SUGGESTION_FIRST_WORDS
+_STOP_LINE_RE = re.compile("|".join((
+    rf"(?ai:{'|'.join(sorted(_SPEED_WORDS))})",
+    r"[\d.]*\d[\d.]*\s*[ms]*s",
+    r"(?i:[\d.]+m?s(?:\s+(?:fast|slow|medium))?)",
+    "|".join(map(re.escape, sorted(_ACTION_LINES))),
+    r"[↳→](?s:.*)",
+    rf"(?:{'|'.join(sorted(_SUGGESTION_FIRST_WORDS))})(?=\s|\Z)(?:\s+\S+){{0,5}}",
+)))
+
+
+def _response_lines(lines, start_idx: int) -> list:
+    """
+    Extract the response from the page lines that follow the prompt.
+
+    The response is between the prompt and the action buttons/suggestions;
+    blank and very short lines are skipped.
+    """
+    response_lines = []
+    for line in lines[start_idx:start_idx + 30]:
+        line = line.strip()
+
+        # Skip empty lines at start
+        if not line and not response_lines:
+            continue
+
+        # Stop at timing info, action buttons and suggestions
+        if _STOP_LINE_RE.fullmatch(line):
+            break
+
+        # Skip very short lines (icons, single chars)
+        if len(line) <= 2:
+            continue
+
+        response_lines.append(line)
+    return response_lines
+
+
+# Response poll, called with the prompt, _ERROR_RE.pattern,
+# GROK_STREAMING_SELECTOR and the tick returned by the previous poll.
+# A MutationObserver bumps window.__grokTick on every DOM change; if the
+# tick hasn't moved, nothing is scanned and only {unchanged: true} comes
+# back. Otherwise returns the tick, matched error phrases, readiness flags
+# (including whether the streaming indicator is showing) and the lines
+# after the one where the prompt ends (enough to cover the "Thought for"
+# skip plus 30 response lines). Only that bounded tail is split.
+# thought_line is the index in lines of a "Thought for" marker within the
+# first 4 lines, or -1.
+_POLL_JS = '''((prompt, errorPattern, streamingSelector, lastTick) => {
+    if (!window.__grokObserver) {
+        // Start from the clock so ticks differ across page loads
+        window.__grokTick = Date.now();
+        window.__grokObserver = new MutationObserver(() => { window.__grokTick++; });
+        window.__grokObserver.observe(document.body, {
+            childList: true, subtree: true, characterData: true, attributes: true
+        });
+    }
+    const tick = window.__grokTick;
+    if (tick === lastTick) return {unchanged: true};
+
+    const text = document.body.innerText;
+    const lower = text.toLowerCase();
+    const anchor = text.indexOf(prompt);
+    const lines = anchor < 0 ? [] : text.slice(anchor + prompt.length).split('\\n', 35).slice(1);
+    const thought = anchor < 0 ? -1 : text.indexOf('Thought for', anchor);
+    return {
+        tick: tick,
+        errors: [...new Set(text.match(new RegExp(errorPattern, 'gi')) || [])],
+        has_prompt: anchor >= 0,
+        has_timing: lower.includes('ms') || lower.includes('fast') || lower.includes('slow'),
+        has_thought: thought >= 0 || text.includes('Thought for'),
+        thought_line: thought < 0 ? -1 : lines.findIndex((line, i) => i < 4 && line.includes('Thought for')),
+        streaming: document.querySelector(streamingSelector) !== null,
+        length: text.length,
+        lines: lines
+    };
+})'''
+
+# Longest wait between polls (seconds). The next poll runs as soon as the
+# observer installed by _POLL_JS sees a change; a window with no change
+# counts toward the response being stable
+_POLL_IDLE = 0.4
+# Accept text that hasn't changed for this long (seconds) even if the DOM
+# never goes quiet, e.g. because of a running timer elsewhere on the page
+_STABLE_AFTER = 2.0
+
+# Resolves true on the next DOM change after the given tick, or false after
+# the given number of ms without one. Awaited in the page, so an idle wait
+# is one round trip rather than a poll loop. Called with (tick, ms).
+_NEXT_CHANGE_JS = '''((lastTick, ms) => new Promise(resolve => {
+    if (window.__grokTick !== lastTick) return resolve(true);
+    const done = (changed) => { observer.disconnect(); clearTimeout(timer); resolve(changed); };
+    const observer = new MutationObserver(() => done(true));
+    const timer = setTimeout(() => done(false), ms);
+    observer.observe(document.body, {childList: true, subtree: true, characterData: true, attributes: true});
+}))'''
+
+# Post-navigation setup, run as one awaited evaluate. Called with
+# (targetModel or null, _INPUT_SELECTOR); returns a dict of flags.
+_BOOTSTRAP_JS = '''(async (targetModel, inputSelector) => {
+    const sleep = (ms) => new Promise(r => setTimeout(r, ms));
+    const waitFor = async (fn, ms) => {
+        const end = Date.now() + ms;
+        let value = fn();
+        while (!value && Date.now() < end) {
+            await sleep(100);
+            value = fn();
+        }
+        return value;
+    };
+    const noDialog = () => !document.querySelector('[role="dialog"]');
+    const menuItems = '[role="menuitem"], [role="option"], [role="menuitemradio"]';
+    const result = {
+        modal_dismissed: false, new_chat_clicked: false,
+        model_opened: false, model_selected: false, input_found: false
+    };
+
+    // Clear the tag left by a previous prompt on this tab
+    for (const el of document.querySelectorAll('[data-grok-cli-input]')) {
+        el.removeAttribute('data-grok-cli-input');
+    }
+
+    // Dismiss any modal popups (grok.com shows upgrade/sign-in modals):
+    // the X button is small, has no text, just an SVG; else press Escape
+    for (const btn of document.querySelectorAll('button')) {
+        if (btn.querySelector('svg') && !(btn.innerText || '').trim() && btn.offsetWidth < 60) {
+            btn.click();
+            result.modal_dismissed = true;
+            break;
+        }
+    }
+    if (!result.modal_dismissed) {
+        document.dispatchEvent(new KeyboardEvent('keydown', {
+            key: 'Escape', code: 'Escape', keyCode: 27, bubbles: true
+        }));
+    }
+    if (!await waitFor(noDialog, 1500)) {
+        // Still there: click the backdrop at the far left of the viewport
+        const modal = document.querySelector('[role="dialog"]');
+        if (modal) {
+            const rect = modal.getBoundingClientRect();
+            document.elementFromPoint(10, rect.top + 10)?.dispatchEvent(new MouseEvent('click', {
+                bubbles: true, cancelable: true, view: window,
+                clientX: 10, clientY: rect.top + 10
+            }));
+            await waitFor(noDialog, 1000);
+        }
+    }
+
+    // Start a new chat (dismisses any rate limit dialogs)
+    const newChat = document.querySelector('[aria-label="New chat"], [data-testid="newChat"]');
+    if (newChat) {
+        newChat.click();
+        result.new_chat_clicked = true;
+        await sleep(100);
+    }
+
+    // Select model: open the "Grok X.X Thinking" dropdown in the header,
+    // then click the matching menu option
+    if (targetModel) {
+        const header = document.querySelector('header') || document.body;
+        for (const el of header.querySelectorAll('div, button, span')) {
+            const text = el.innerText || '';
+            if (text.match(/Grok\\s+[0-9]/) && text.includes('Thinking') &&
+                (el.closest('[aria-haspopup]') || el.querySelector('svg') || text.length < 30)) {
+                el.click();
+                result.model_opened = true;
+                break;
+            }
+        }
+        if (result.model_opened) {
+            await waitFor(() => document.querySelector(menuItems), 1500);
+            for (const item of document.querySelectorAll(menuItems)) {
+                if (item.innerText.toLowerCase().includes(targetModel.toLowerCase())) {
+                    item.click();
+                    result.model_selected = true;
+                    break;
                 }
             }
-            return false;
-        }''')
+            await waitFor(() => !document.querySelector(menuItems), 1000);
+        }
+    }
+
+    // Find the input: known selectors, any contenteditable, then by
+    // placeholder or nearby text
+    const findInput = () => {
+        const el = document.querySelector(inputSelector) ||
+            document.querySelector('div[contenteditable="true"]');
+        if (el) return el;
+        for (const input of document.querySelectorAll('input, textarea, [contenteditable="true"]')) {
+            const placeholder = (input.getAttribute('placeholder') || input.getAttribute('data-placeholder') || '').toLowerCase();
+            if (placeholder.includes('what do you want') || placeholder.includes('ask')) return input;
+        }
+        const textNode = document.evaluate(
+            "//text()[contains(., 'What do you want')]",
+            document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+        return textNode?.parentElement?.closest('[contenteditable], input, textarea') || null;
+    };
+    const input = await waitFor(findInput, 5000);
+    if (input) {
+        // Tag it so Python can grab the element handle with one select
+        input.setAttribute('data-grok-cli-input', '');
+        input.focus();
+        result.input_found = true;
+    }
+    return result;
+})'''
+
+
+async def wait_for(page, predicate, timeout: float, interval: float = 0.1):
+    """
+    Poll predicate until it returns something truthy or timeout expires.
+
+    predicate may return a plain value or a coroutine; errors
+    count as falsy. Returns the last result.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = predicate()
+            if asyncio.iscoroutine(result):
+                result = await result
+        except Exception:
+            result = None
+        if result or time.monotonic() >= deadline:
+            return result
+        await page.sleep(interval)
+
+
+async def wait_for_selector(page, selector: str, timeout: float) -> bool:
+    """
+    Wait until selector matches in the page or timeout expires.
+
+    The wait runs in the page (see _SELECTOR_JS). If the document is
+    replaced mid-wait, e.g. by a navigation, it is started again on the
+    new one. Returns whether the selector matched.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            found = await asyncio.wait_for(
+                page.evaluate(
+                    f"{_SELECTOR_JS}({json.dumps(selector)}, {max(0, int(remaining * 1000))})",
+                    await_promise=True,
+                ),
+                remaining + 1,
+            )
+            if found is True:
+                return True
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        await page.sleep(0.1)
+
+
+async def _install_helpers(page):
+    """Define window.__grok in the current document and all later ones."""
+    await page.send(cdp.page.add_script_to_evaluate_on_new_document(source=_HELPERS_JS))
+    await page.evaluate(_HELPERS_JS)
+
+
+def _url_changed(page, url: str):
+    """Predicate for wait_for(): True once the page has left url."""
+    return lambda: page.url != url
+
+
+async def handle_grok_auth(page, browser, x_cookies):
+    """
+    Handle grok.com OAuth flow via X.com sign-in.
+
+    x_cookies is the "x" bucket from classify_cookies().
 
-        if needs_signin:
-            # Use nodriver's select to find and click the sign-in button
+    Returns:
+        tuple: (page, success, error_message)
+    """
+    # Check current URL
+    current_url = page.url
+
+    # First, inject X.com cookies (needed for OAuth)
+    await inject_cookies(browser, x_cookies)
+
+    # Check if we're on grok.com and need to sign in
+    if "grok.com" in current_url and "sign-in" not in current_url:
+        # Check if there's a sign-in button in header (indicates not logged in)
+        if await page.evaluate("!!window.__grok?.needsSignin()"):
             try:
-                # Find the Sign in link/button in header
-                sign_in_elements = await page.query_selector_all('button, a')
-                for el in (sign_in_elements or []):
-                    text = await page.evaluate('(el) => el.innerText', el)
-                    if text and text.strip() == 'Sign in':
-                        await el.click()
-                        await page.sleep(3)
-                        current_url = page.url
-                        break
+                # Click the Sign in link/button in header
+                if await page.evaluate("!!window.__grok?.clickSignIn()"):
+                    await wait_for(page, _url_changed(page, current_url), 3)
+                    current_url = page.url
             except Exception:
                 pass
 
     # If we're on accounts.x.ai sign-in page, complete the OAuth flow
     if "accounts.x.ai" in current_url or "sign-in" in current_url:
         # Look for "Sign in with X" or similar button
-        await page.sleep(2)
-
-        # Try multiple selectors for the X sign-in button
-        sign_in_clicked = False
-        sign_in_selectors = [
-            'button:has-text("Sign in with X")',
-            'button:has-text("Continue with X")',
-            'a:has-text("Sign in with X")',
-            '[data-testid="OAuth_Consent_Button"]',
-        ]
-
-        # Use JavaScript to find and click the sign-in button
-        sign_in_clicked = await page.evaluate('''() => {
-            const buttons = document.querySelectorAll('button, a');
-            for (const btn of buttons) {
-                const text = btn.innerText || btn.textContent || '';
-                if (text.includes('Sign in with X') || text.includes('Continue with X') ||
-                    text.includes('Sign in with 𝕏') || text.includes('Continue with 𝕏')) {
-                    btn.click();
-                    return true;
-                }
-            }
-            // Also check for X logo button
-            const xButtons = document.querySelectorAll('[aria-label*="X"], [aria-label*="Twitter"]');
-            for (const btn of xButtons) {
-                if (btn.tagName === 'BUTTON' || btn.tagName === 'A') {
-                    btn.click();
-                    return true;
-                }
-            }
-            return false;
-        }''')
+        await wait_for_selector(page, "button, a", 2)
+
+        # Find and click the "Sign in with X" button
+        sign_in_clicked = await page.evaluate("!!window.__grok?.clickXSignIn()")
 
         if sign_in_clicked:
-            await page.sleep(3)
+            await wait_for(page, _url_changed(page, current_url), 3)
 
             # Check if we need to authorize the app (OAuth consent screen)
             current_url = page.url
             if "oauth" in current_url.lower() or "authorize" in current_url.lower():
                 # Look for authorize/allow button
-                await page.evaluate('''() => {
-                    const buttons = document.querySelectorAll('button, input[type="submit"]');
-                    for (const btn of buttons) {
-                        const text = (btn.innerText || btn.value || '').toLowerCase();
-                        if (text.includes('authorize') || text.includes('allow') || text.includes('continue')) {
-                            btn.click();
-                            return true;
-                        }
-                    }
-                    return false;
-                }''')
-                await page.sleep(3)
+                await page.evaluate(f"!!window.__grok?.clickButtonWith({json.dumps(_AUTHORIZE_WORDS)})")
 
             # Wait for redirect back to grok.com
-            for _ in range(10):
-                current_url = page.url
-                if "grok.com" in current_url and "sign-in" not in current_url:
-                    return page, True, None
-                await page.sleep(1)
+            back_on_grok = lambda: "grok.com" in page.url and "sign-in" not in page.url
+            if await wait_for(page, back_on_grok, 13):
+                return page, True, None
 
         # If we're still on sign-in page, auth failed
         return page, False, f"OAuth flow incomplete. URL: {page.url}"
@@ -171,614 +638,908 @@ async def handle_grok_auth(page, browser, cookies):
     return page, True, None
 
 
-async def prompt_grok(
-    prompt: str,
-    headless: bool = None,
-    timeout: int = None,
-    screenshot: str = None,
-    show_browser: bool = False,
-    raw: bool = False,
-    model: str = None,
-    use_xcom: bool = False,
-    session_id: str = None
-) -> dict:
+async def _open_grok_page(browser, cookies, use_xcom: bool, screenshot: str = None):
     """
-    Send a prompt to Grok and get the response.
-
-    Args:
-        prompt: The prompt to send to Grok
-        headless: Run headless (default from config)
-        timeout: Response timeout in seconds
-        screenshot: Path to save screenshot after response
-        show_browser: Show browser window (overrides headless)
-        raw: Return raw response without formatting
-        model: Grok model to use (thinking, grok-2, grok-3)
+    Inject cookies, open Grok in a new tab and make sure we're signed in.
 
     Returns:
-        dict with response text and metadata
+        tuple: (page, cookies_injected, error_result or None)
     """
-    if headless is None:
-        headless = HEADLESS
-    if show_browser:
-        headless = False
-    if timeout is None:
-        timeout = DEFAULT_TIMEOUT
+    # Determine if using standalone grok.com or x.com/i/grok
+    grok_url = GROK_URL_XCOM if use_xcom else GROK_URL
+    buckets = classify_cookies(cookies)
+
+    if "grok.com" in grok_url:
+        # For grok.com: inject X.com and grok.com/x.ai cookies in one
+        # batch (Storage.setCookies doesn't need the page on that domain)
+        injected = await inject_cookies(browser, buckets["x"] + buckets["grok"])
+
+        # Load grok.com with cookies set
+        page = await browser.get(grok_url, new_tab=True)
+        await _install_helpers(page)
+        await wait_for_selector(page, _INPUT_SELECTOR, 3)
+
+        # Handle OAuth flow if needed
+        page, auth_success, auth_error = await handle_grok_auth(page, browser, buckets["x"])
+        if not auth_success:
+            return page, injected, {
+                "success": False,
+                "error": auth_error or "Authentication failed",
+                "url": page.url
+            }
+    else:
+        # For x.com/i/grok: Set cookies first, then navigate
+        injected = await inject_cookies(browser, buckets["x"])
 
-    browser = None
+        # Navigate to Grok
+        page = await browser.get(grok_url, new_tab=True)
+        await wait_for_selector(page, _INPUT_SELECTOR, 3)
 
-    try:
-        # Extract cookies from Chrome - include grok.com and x.ai domains for standalone
-        domains_to_extract = ["x.com", "twitter.com"]
-        if not use_xcom:
-            # Add grok.com and x.ai domains for standalone grok.com
-            domains_to_extract.extend(["grok.com", "x.ai", "accounts.x.ai"])
+    # Check if we're on Grok page (not login or challenge)
+    current_url = page.url
+    page_text = await page.evaluate('document.body.innerText') or ""
 
-        result = extract_chrome_cookies(domains_to_extract, decrypt=True)
-        if not result.get("success"):
-            return {
-                "success": False,
-                "error": f"Cookie extraction failed: {result.get('error')}"
-            }
-        cookies = result.get("cookies", [])
+    # Check for Cloudflare challenge (common in headless mode)
+    if "cloudflare_blocked" in _error_categories(m.group() for m in _ERROR_RE.finditer(page_text)):
+        if screenshot:
+            await page.save_screenshot(screenshot)
+        return page, injected, {
+            "success": False,
+            "error": "Cloudflare challenge detected. Use --show-browser flag to bypass.",
+            "cloudflare_blocked": True,
+            "hint": "Headless mode triggers Cloudflare protection on grok.com. Run with --show-browser instead.",
+            "screenshot": screenshot
+        }
+
+    if "login" in current_url or "flow" in current_url or "sign-in" in current_url:
+        return page, injected, {
+            "success": False,
+            "error": "Authentication failed - redirected to login. Re-login in Chrome.",
+            "url": current_url
+        }
+
+    return page, injected, None
 
-        if not cookies:
-            return {
-                "success": False,
-                "error": "No X.com cookies found. Make sure you're logged into X.com in Chrome."
-            }
 
-        # Determine browser profile directory (unique per session for concurrency)
-        if session_id:
-            browser_profile = USER_DATA_DIR.parent / f"browser_profile_{session_id}"
-            browser_profile.mkdir(exist_ok=True)
+class _ResponseStream:
+    """
+    Passes a response to a stream_cb callback as it grows, each part once.
+
+    Snapshots that don't extend the text already sent (Grok re-rendering
+    it) are skipped. If the final text still differs from what was sent,
+    only its lines after the ones already sent go out and `rewritten` is
+    set; text is never sent twice. A callback that raises ends streaming.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.active = callback is not None
+        self.sent = ""
+        self.rewritten = False
+
+    def update(self, text: str):
+        """Send what a snapshot adds to the text sent so far."""
+        if self.active and text != self.sent and text.startswith(self.sent):
+            self._send(text[len(self.sent):], text)
+
+    def finish(self, text: str):
+        """Send the rest of the final text."""
+        if not self.active or text == self.sent:
+            return
+        if text.startswith(self.sent):
+            self._send(text[len(self.sent):], text)
         else:
-            browser_profile = USER_DATA_DIR
+            self.rewritten = True
+            self._send(''.join(text.splitlines(keepends=True)[self.sent.count('\n'):]), text)
 
-        # Start stealth browser
-        browser = await uc.start(
-            headless=headless,
-            user_data_dir=str(browser_profile),
-            browser_args=BROWSER_ARGS
-        )
+    def _send(self, chunk: str, text: str):
+        if chunk:
+            try:
+                self.callback(chunk)
+            except Exception:
+                self.active = False
+                return
+        self.sent = text
 
-        # Determine if using standalone grok.com or x.com/i/grok
-        grok_url = GROK_URL_XCOM if use_xcom else GROK_URL
-        using_standalone = "grok.com" in grok_url
 
-        if using_standalone:
-            # For grok.com: First inject all relevant cookies
-            injected = 0
+async def _ask_grok(page, prompt: str, timeout: int, screenshot: str,
+                    model: str, using_standalone: bool, stream_cb=None) -> dict:
+    """
+    Start a new chat on an open Grok page, send the prompt and wait for
+    the response.
 
-            # Navigate to x.com first to set X.com cookies
-            page = await browser.get("https://x.com")
-            await page.sleep(1)
+    If stream_cb is given, it is called with the response text as it
+    arrives, a line at a time once each line is complete (see
+    _ResponseStream). result["streamed"] says whether stream_cb got the
+    whole response, and result["stream_rewritten"] whether lines it got
+    early differ from the final response.
 
-            for c in cookies:
-                if not c.get("value"):
-                    continue
-                cookie_domain = c.get("domain", "").lstrip(".")
-                if not any(d in cookie_domain for d in ["x.com", "twitter.com"]):
-                    continue
-                try:
-                    same_site = None
-                    if c.get("same_site") in ["Strict", "Lax", "None"]:
-                        same_site = cdp.network.CookieSameSite(c["same_site"])
-                    param = cdp.network.CookieParam(
-                        name=c["name"],
-                        value=c["value"],
-                        domain=c.get("domain"),
-                        path=c.get("path", "/"),
-                        secure=c.get("secure", False),
-                        http_only=c.get("http_only", False),
-                        same_site=same_site,
-                    )
-                    await browser.connection.send(cdp.storage.set_cookies([param]))
-                    injected += 1
-                except Exception:
-                    pass
+    Returns:
+        dict with response text and metadata
+    """
+    # Dismiss modals, start a new chat, pick the model and focus the
+    # input in a single round trip (see _BOOTSTRAP_JS)
+    selected_model = model or DEFAULT_MODEL
+    target_model_name = None
+    if selected_model and selected_model != "thinking":
+        target_model_name = GROK_MODELS.get(selected_model, selected_model)
+
+    input_element = None
+    try:
+        bootstrap = await page.evaluate(
+            f"{_BOOTSTRAP_JS}({json.dumps(target_model_name)}, {json.dumps(_INPUT_SELECTOR)})",
+            await_promise=True,
+            return_by_value=True,
+        )
+        if isinstance(bootstrap, dict) and bootstrap.get("input_found"):
+            input_element = await page.select('[data-grok-cli-input]', timeout=2)
+    except Exception:
+        pass
 
-            # Navigate to grok.com to set grok.com/x.ai cookies
-            page = await browser.get("https://grok.com")
-            await page.sleep(1)
+    if not input_element:
+        if screenshot:
+            await page.save_screenshot(screenshot)
+        return {
+            "success": False,
+            "error": "Could not find Grok input field",
+            "screenshot": screenshot
+        }
 
-            for c in cookies:
-                if not c.get("value"):
-                    continue
-                cookie_domain = c.get("domain", "").lstrip(".")
-                if not any(d in cookie_domain for d in ["grok.com", "x.ai"]):
-                    continue
-                try:
-                    same_site = None
-                    if c.get("same_site") in ["Strict", "Lax", "None"]:
-                        same_site = cdp.network.CookieSameSite(c["same_site"])
-                    param = cdp.network.CookieParam(
-                        name=c["name"],
-                        value=c["value"],
-                        domain=c.get("domain"),
-                        path=c.get("path", "/"),
-                        secure=c.get("secure", False),
-                        http_only=c.get("http_only", False),
-                        same_site=same_site,
-                    )
-                    await browser.connection.send(cdp.storage.set_cookies([param]))
-                    injected += 1
-                except Exception:
-                    pass
+    # Click the input and type the prompt
+    await input_element.click()
+    await page.sleep(0.1)
+
+    # Insert the prompt in one CDP call instead of typing it key by key;
+    # if the editor ignored it, set the value directly
+    await page.send(cdp.input_.insert_text(text=prompt))
+    typed = await page.evaluate(_INPUT_TEXT_JS)
+    if not (isinstance(typed, str) and typed.strip()):
+        await page.evaluate(f"{_SET_INPUT_JS}({json.dumps(prompt)})")
+
+    # Try to submit - first try clicking the submit button, then fallback to Enter.
+    # All known submit/send selectors are tried in one evaluate per check
+    submitted = False
+    if await wait_for_selector(page, _SUBMIT_SELECTOR, 3):
+        try:
+            submitted = await page.evaluate(_CLICK_SUBMIT_JS) is True
+        except Exception:
+            pass
 
-            # Reload grok.com with cookies set
-            page = await browser.get(grok_url)
-            await page.sleep(3)
+    if not submitted:
+        # Fallback to pressing Enter
+        await input_element.send_keys("\n")
+
+    # Wait for the prompt to show up in the conversation
+    prompt_shown_js = f"document.body.innerText.includes({json.dumps(prompt)})"
+    await wait_for(page, lambda: page.evaluate(prompt_shown_js), 2)
+
+    # Wait for response - look for "Thought for" indicator first, then get response
+    response_text = None
+    start_time = time.time()
+    last_sig = None
+    sig_since = 0.0
+    stable_count = 0
+    poll_args = f"{json.dumps(prompt)}, {json.dumps(_ERROR_RE.pattern)}, {json.dumps(GROK_STREAMING_SELECTOR)}"
+    last_poll = {}
+    # Set once Grok's streaming indicator has shown; when it goes away the
+    # answer is complete and there's no need to wait for stable snapshots
+    seen_streaming = False
+    # Sleep between polls when the DOM can't be watched; grows from 0.1s to 1s
+    retry_interval = 0.1
+    stream = _ResponseStream(stream_cb)
+
+    while time.time() - start_time < timeout:
+        poll = {}
+        try:
+            # Scan the page in-browser; only flags and the lines from
+            # the prompt onward come back over CDP, and nothing at all
+            # if the DOM hasn't changed since the last poll
+            poll = await page.evaluate(
+                f"{_POLL_JS}({poll_args}, {json.dumps(last_poll.get('tick'))})",
+                return_by_value=True,
+            )
+            quiet = False
+            if not isinstance(poll, dict):
+                poll = {}
+            elif poll.get("unchanged"):
+                poll = last_poll
+                quiet = True
+            else:
+                last_poll = poll
+            errors = _error_categories(poll.get("errors") or ())
+            streaming = poll.get("streaming")
+            seen_streaming = seen_streaming or streaming
+
+            # Check for rate limit or capacity errors
+            if "rate_limited" in errors:
+                if screenshot:
+                    await page.save_screenshot(screenshot)
+                return {
+                    "success": False,
+                    "error": "Rate limit reached (15 Thinking queries/20hrs). Wait for reset or upgrade to Premium+.",
+                    "rate_limited": True,
+                    "hint": "Model switching unavailable while rate limited - the dialog blocks UI interaction.",
+                    "screenshot": screenshot
+                }
 
-            # Handle OAuth flow if needed
-            page, auth_success, auth_error = await handle_grok_auth(page, browser, cookies)
-            if not auth_success:
+            # Check for grok.com capacity/heavy usage error
+            if "capacity_limited" in errors:
+                # Try to sign in to get priority access
+                if using_standalone:
+                    # Click the Sign in button in the capacity error message
+                    try:
+                        sign_in_clicked = await page.evaluate("!!window.__grok?.clickSignIn()")
+                        if sign_in_clicked:
+                            await wait_for(page, _url_changed(page, page.url), 5)
+                            # Check if we're now on sign-in page
+                            current_signin_url = page.url
+                            if "accounts.x.ai" in current_signin_url or "x.com" in current_signin_url:
+                                # Complete OAuth - look for authorize button
+                                await page.evaluate(f"!!window.__grok?.clickButtonWith({json.dumps(_AUTHORIZE_WORDS + ['sign in'])})")
+                                await wait_for(page, _url_changed(page, current_signin_url), 5)
+                                # If back on grok.com, retry the query
+                                if "grok.com" in page.url and "sign-in" not in page.url:
+                                    continue  # Retry the response polling
+                    except Exception:
+                        pass
+
+                if screenshot:
+                    await page.save_screenshot(screenshot)
                 return {
                     "success": False,
-                    "error": auth_error or "Authentication failed",
-                    "url": page.url
+                    "error": "Grok is under heavy usage. Sign in for higher priority or try again later.",
+                    "capacity_limited": True,
+                    "hint": "Sign in to grok.com for priority access, or use --xcom flag to use x.com/i/grok instead.",
+                    "screenshot": screenshot
                 }
+
+            # Check if response is ready
+            # For x.com/i/grok thinking model: look for "Thought for" indicator
+            # For grok.com or other models: look for response content after prompt
+            is_thinking_model = (model or DEFAULT_MODEL) == "thinking"
+            is_standalone = using_standalone
+
+            # Different detection for standalone grok.com vs x.com/i/grok
+            if is_standalone:
+                # grok.com shows response timing (e.g., "911ms Fast") below response
+                has_response = poll.get("has_prompt") and poll.get("has_timing")
+            else:
+                has_response = poll.get("has_thought") if is_thinking_model else (poll.get("has_prompt") and poll.get("length", 0) > len(prompt) + 100)
+
+            if has_response:
+                # The lines following the one that ends the prompt
+                lines = poll.get("lines") or []
+
+                if poll.get("has_prompt"):
+                    # For grok.com: response appears after prompt, before timing info
+                    # For x.com: response appears after "Thought for" marker,
+                    # so skip past that line if present
+                    start_idx = 0 if is_standalone else poll.get("thought_line", -1) + 1
+
+                    # A quiet poll is the previous snapshot, so its filtered
+                    # lines are reused rather than recomputed
+                    response_lines = poll.get("response_lines")
+                    if response_lines is None:
+                        response_lines = poll["response_lines"] = _response_lines(lines, start_idx)
+
+                    if response_lines:
+                        if seen_streaming and not streaming:
+                            response_text = '\n'.join(response_lines)
+                            break
+                        # Every line but the last is complete; pass on the new ones
+                        if stream.active:
+                            stream.update(''.join(line + '\n' for line in response_lines[:-1]))
+                        # Compare hashes rather than holding or joining the text;
+                        # it is joined once, when it's accepted.
+                        # Stable once the text is unchanged for _STABLE_AFTER, or
+                        # for two quiet idle windows if the streaming indicator
+                        # was seen (without it a pause for search or slow tokens
+                        # looks the same). Never while Grok shows it's generating;
+                        # the branch above ends that case
+                        sig = hash(tuple(response_lines))
+                        if sig != last_sig:
+                            last_sig = sig
+                            sig_since = time.monotonic()
+                            stable_count = 0
+                        else:
+                            if quiet:
+                                stable_count += 1
+                            stable = (time.monotonic() - sig_since >= _STABLE_AFTER
+                                      or (seen_streaming and stable_count >= 2))
+                            if stable and not streaming:
+                                response_text = '\n'.join(response_lines)
+                                break
+        except Exception:
+            pass
+
+        if response_text:
+            break
+
+        # Wait for the next DOM change rather than a fixed interval
+        tick = poll.get("tick")
+        try:
+            if tick is None:
+                raise ValueError("no tick yet")
+            await page.evaluate(
+                f"{_NEXT_CHANGE_JS}({tick}, {int(_POLL_IDLE * 1000)})",
+                await_promise=True,
+            )
+        except Exception:
+            # Nothing to watch (e.g. the page is reloading): back off
+            await page.sleep(retry_interval)
+            retry_interval = min(1.0, retry_interval * 1.3)
         else:
-            # For x.com/i/grok: Set cookies first, then navigate
-            page = await browser.get("https://x.com")
-            await page.sleep(1)
+            retry_interval = 0.1
+
+    if response_text:
+        stream.finish(response_text + '\n')
+
+    # Take screenshot if requested
+    if screenshot:
+        await page.save_screenshot(screenshot)
+
+    if not response_text:
+        return {
+            "success": False,
+            "error": "Timeout waiting for Grok response",
+            "screenshot": screenshot
+        }
+
+    # Estimate tokens for Claude Code context budget
+    response_tokens = estimate_tokens(response_text)
+    prompt_tokens = estimate_tokens(prompt)
+
+    result = {
+        "success": True,
+        "response": response_text,
+        "prompt": prompt,
+        "tokens": {
+            "response": response_tokens,
+            "prompt": prompt_tokens,
+            "total": response_tokens + prompt_tokens
+        }
+    }
+
+    if screenshot:
+        result["screenshot"] = screenshot
+    if stream_cb:
+        result["streamed"] = stream.active
+        result["stream_rewritten"] = stream.rewritten
+
+    return result
 
-            # Inject cookies via CDP
-            injected = 0
-            for c in cookies:
-                if not c.get("value"):
-                    continue
 
-                # Filter to X.com/twitter.com domains
-                cookie_domain = c.get("domain", "").lstrip(".")
-                if not any(d in cookie_domain for d in ["x.com", "twitter.com"]):
-                    continue
 
+# Decrypted cookies keyed by (domains, Chrome cookie DB mtime_ns).
+# Workers extract from threads, so the cache is read and filled under the lock
+_COOKIE_CACHE: dict = {}
+_COOKIE_CACHE_LOCK = threading.Lock()
+
+# Decrypted cookies shared across invocations: {"mtime_ns": ..., "results":
+# {"x.com,twitter.com": extract_cookies() result, ...}}. Owner-only (0600).
+COOKIE_CACHE_FILE = DATA_DIR / ".cookie_cache.json"
+
+
+def _cookies_unexpired(result: dict) -> bool:
+    """False if any persistent cookie in an extract_cookies() result has expired."""
+    # extract_cookies() already reports expiry in Unix seconds
+    now = time.time()
+    return all(
+        not c.get("expires") or c["expires"] > now
+        for c in result.get("cookies", ())
+    )
+
+
+def _drop_expired(result: dict) -> dict:
+    """
+    An extract_cookies() result without the persistent cookies that have
+    already expired. Chrome keeps those in its DB until it cleans up; they
+    are no use to inject and would make _cookies_unexpired() fail at once.
+    """
+    now = time.time()
+    cookies = [c for c in result.get("cookies", ()) if not c.get("expires") or c["expires"] > now]
+    return {**result, "cookies": cookies, "count": len(cookies)}
+
+
+def _read_cookie_cache(mtime: int) -> dict:
+    """Cached results for this cookie DB mtime ({} if missing or stale)."""
+    try:
+        cache = json.loads(COOKIE_CACHE_FILE.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("mtime_ns") != mtime:
+        return {}
+    return cache.get("results") or {}
+
+
+def _write_cookie_cache(mtime: int, results: dict):
+    """Atomically replace the cookie cache file, readable by the owner only."""
+    # mkstemp creates the file 0600 under a unique name
+    fd, tmp = tempfile.mkstemp(dir=COOKIE_CACHE_FILE.parent, prefix=COOKIE_CACHE_FILE.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"mtime_ns": mtime, "results": results}, f)
+        os.replace(tmp, COOKIE_CACHE_FILE)
+    except OSError:
+        Path(tmp).unlink(missing_ok=True)
+
+
+def _extract_cookies_cached(domains) -> dict:
+    """
+    extract_cookies() for these domains, reusing the last result while
+    Chrome's cookie DB is unchanged (skips the Keychain and decryption).
+
+    Results are kept in memory and in COOKIE_CACHE_FILE, so separate
+    invocations share them too. A cached result is dropped once any of its
+    cookies has expired.
+    """
+    from chrome_cookies import CHROME_COOKIE_PATH, extract_cookies
+
+    try:
+        mtime = CHROME_COOKIE_PATH.stat().st_mtime_ns
+    except OSError:
+        return extract_cookies(list(domains), decrypt=True)
+
+    key = (tuple(domains), mtime)
+    # Held across extraction too, so workers starting together decrypt once
+    with _COOKIE_CACHE_LOCK:
+        result = _COOKIE_CACHE.get(key)
+        if result is not None and _cookies_unexpired(result):
+            return result
+
+        disk_key = ",".join(domains)
+        disk = _read_cookie_cache(mtime)
+        result = disk.get(disk_key)
+        if not (isinstance(result, dict) and result.get("success") and _cookies_unexpired(result)):
+            result = extract_cookies(list(domains), decrypt=True)
+            if not result.get("success"):
+                return result
+            result = _drop_expired(result)
+            disk[disk_key] = result
+            _write_cookie_cache(mtime, disk)
+
+        # Anything cached against an older DB is stale now
+        for stale in [k for k in _COOKIE_CACHE if k[1] != mtime]:
+            del _COOKIE_CACHE[stale]
+        _COOKIE_CACHE[key] = result
+        return result
+
+
+# Marks when Chrome's cookies were last injected into a browser profile.
+# Holds the scope injected: "x" (X.com only) or "grok" (X.com + grok.com).
+COOKIE_SENTINEL = ".cookies_injected_at"
+
+
+def _profile_cookies_fresh(sentinel: Path, scope: str) -> bool:
+    """
+    Check whether a profile's injected cookies can be reused: injected
+    within COOKIE_SNAPSHOT_TTL, after Chrome last wrote its cookie DB, and
+    covering the needed scope.
+    """
+    from chrome_cookies import CHROME_COOKIE_PATH
+
+    try:
+        injected_at = sentinel.stat().st_mtime
+        if time.time() - injected_at > COOKIE_SNAPSHOT_TTL:
+            return False
+        if injected_at <= CHROME_COOKIE_PATH.stat().st_mtime:
+            return False
+        return scope == "x" or sentinel.read_text() == "grok"
+    except OSError:
+        return False
+
+
+class GrokWorker:
+    """
+    Holds one Grok tab and answers queued prompts on it, one at a time.
+
+    The first prompt pays for cookie injection, navigation and sign-in;
+    later ones just start a new chat on the warm tab. A failed prompt
+    closes the tab so the next one starts from a fresh page.
+    """
+
+    def __init__(self, headless: bool, browser_profile: Path, use_xcom: bool, model: str):
+        self.headless = headless
+        self.browser_profile = browser_profile
+        self.use_xcom = use_xcom
+        self.model = model
+        self.queue = asyncio.Queue()
+        self.busy = False
+        self.page = None
+        self.cookies_used = 0
+        self._task = None
+
+    @property
+    def load(self) -> int:
+        """Prompts queued or in progress."""
+        return self.queue.qsize() + self.busy
+
+    def submit(self, prompt: str, timeout: int, screenshot: str = None,
+               stream_cb=None) -> "asyncio.Future":
+        """Queue a prompt; the future resolves to prompt_grok's result dict."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((prompt, timeout, screenshot, stream_cb, future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return future
+
+    async def _run(self):
+        while True:
+            prompt, timeout, screenshot, stream_cb, future = await self.queue.get()
+            self.busy = True
+            try:
+                result = await self._handle(prompt, timeout, screenshot, stream_cb)
+            except Exception as e:
+                result = {
+                    "success": False,
+                    "error": str(e)
+                }
+            if not result.get("success"):
+                await self._close_page()
+            self.busy = False
+            if not future.done():
+                future.set_result(result)
+
+    async def _handle(self, prompt: str, timeout: int, screenshot: str, stream_cb=None) -> dict:
+        if self.page is None:
+            # Launch (or reuse) the browser while cookies are read from Chrome
+            browser_task = asyncio.create_task(_get_or_start_browser(self.headless, self.browser_profile))
+
+            # Skip extraction and injection if this profile already holds
+            # a recent copy of Chrome's cookies
+            sentinel = self.browser_profile / COOKIE_SENTINEL
+            scope = "x" if self.use_xcom else "grok"
+            cookies = []
+            error = None
+            if not _profile_cookies_fresh(sentinel, scope):
+                cookies, error = await self._chrome_cookies()
+
+            if error:
+                # Let the launch finish so the browser is pooled and gets stopped
                 try:
-                    same_site = None
-                    if c.get("same_site") in ["Strict", "Lax", "None"]:
-                        same_site = cdp.network.CookieSameSite(c["same_site"])
-
-                    param = cdp.network.CookieParam(
-                        name=c["name"],
-                        value=c["value"],
-                        domain=c.get("domain"),
-                        path=c.get("path", "/"),
-                        secure=c.get("secure", False),
-                        http_only=c.get("http_only", False),
-                        same_site=same_site,
-                    )
-                    await browser.connection.send(cdp.storage.set_cookies([param]))
-                    injected += 1
+                    await browser_task
                 except Exception:
                     pass
+                return error
 
-            # Navigate to Grok
-            page = await browser.get(grok_url)
-            await page.sleep(3)
+            browser = await browser_task
+            self.page, self.cookies_used, error = await _open_grok_page(
+                browser, cookies, self.use_xcom, screenshot
+            )
+            if error and not cookies and not error.get("cloudflare_blocked"):
+                # Injection was skipped, but a newly started browser doesn't
+                # restore session-only cookies: retry once with Chrome's
+                await self._close_page()
+                cookies, cookie_error = await self._chrome_cookies()
+                if cookie_error:
+                    sentinel.unlink(missing_ok=True)
+                    return cookie_error
+                self.page, self.cookies_used, error = await _open_grok_page(
+                    browser, cookies, self.use_xcom, screenshot
+                )
+            if error:
+                # The profile's cookies may be stale; inject next time
+                sentinel.unlink(missing_ok=True)
+                return error
+            if cookies:
+                sentinel.write_text(scope)
+
+        using_standalone = "grok.com" in (GROK_URL_XCOM if self.use_xcom else GROK_URL)
+        result = await _ask_grok(self.page, prompt, timeout, screenshot, self.model,
+                                 using_standalone, stream_cb)
+        if result.get("success"):
+            result["cookies_used"] = self.cookies_used
+        return result
 
-        # Check if we're on Grok page (not login or challenge)
-        current_url = page.url
-        page_text = await page.evaluate('document.body.innerText') or ""
+    async def _chrome_cookies(self):
+        """
+        Read the Grok sign-in cookies from Chrome.
 
-        # Check for Cloudflare challenge (common in headless mode)
-        if "verify you are human" in page_text.lower() or "cloudflare" in page_text.lower():
-            if screenshot:
-                await page.save_screenshot(screenshot)
-            return {
+        Returns:
+            tuple: (cookies, error_result or None)
+        """
+        # Extract cookies from Chrome - include grok.com and x.ai domains for standalone
+        domains_to_extract = ["x.com", "twitter.com"]
+        if not self.use_xcom:
+            # Add grok.com and x.ai domains for standalone grok.com
+            domains_to_extract.extend(["grok.com", "x.ai", "accounts.x.ai"])
+
+        # Keychain, SQLite and decryption block, so run them in a thread
+        result = await asyncio.to_thread(_extract_cookies_cached, domains_to_extract)
+        if not result.get("success"):
+            return [], {
                 "success": False,
-                "error": "Cloudflare challenge detected. Use --show-browser flag to bypass.",
-                "cloudflare_blocked": True,
-                "hint": "Headless mode triggers Cloudflare protection on grok.com. Run with --show-browser instead.",
-                "screenshot": screenshot
+                "error": f"Cookie extraction failed: {result.get('error')}"
             }
-
-        if "login" in current_url or "flow" in current_url or "sign-in" in current_url:
-            return {
+        cookies = result.get("cookies", [])
+        if not cookies:
+            return [], {
                 "success": False,
-                "error": "Authentication failed - redirected to login. Re-login in Chrome.",
-                "url": current_url
+                "error": "No X.com cookies found. Make sure you're logged into X.com in Chrome."
             }
+        return cookies, None
 
-        # Dismiss any modal popups (grok.com shows upgrade/sign-in modals)
-        try:
-            # Try clicking the X button on the modal (visible in top-right of modal)
-            dismissed = await page.evaluate('''() => {
-                // Method 1: Find the X/close button by looking for SVG inside small button
-                const allButtons = document.querySelectorAll('button');
-                for (const btn of allButtons) {
-                    // X button is typically small, circular, contains just an SVG
-                    const svg = btn.querySelector('svg');
-                    const text = (btn.innerText || '').trim();
-                    // X button has no text, just icon
-                    if (svg && !text && btn.offsetWidth < 60) {
-                        btn.click();
-                        return 'x-button';
-                    }
-                }
+    async def _close_page(self):
+        page, self.page = self.page, None
+        if page:
+            try:
+                await page.close()
+            except Exception:
+                pass
 
-                // Method 2: Press Escape to close modal
-                document.dispatchEvent(new KeyboardEvent('keydown', {
-                    key: 'Escape', code: 'Escape', keyCode: 27, bubbles: true
-                }));
-                return 'escape';
-            }''')
-            await page.sleep(1.5)
-
-            # Double-check if modal is gone, try clicking outside it if still there
-            still_has_modal = await page.evaluate('''() => {
-                const modal = document.querySelector('[role="dialog"]');
-                if (modal) {
-                    // Try to click the overlay/backdrop behind modal
-                    const rect = modal.getBoundingClientRect();
-                    // Click far left of viewport (outside modal)
-                    const clickEvent = new MouseEvent('click', {
-                        bubbles: true, cancelable: true, view: window,
-                        clientX: 10, clientY: rect.top + 10
-                    });
-                    document.elementFromPoint(10, rect.top + 10)?.dispatchEvent(clickEvent);
-                    return true;
-                }
-                return false;
-            }''')
-            if still_has_modal:
-                await page.sleep(1)
-        except Exception:
-            pass
+    def cancel(self):
+        """Stop the worker loop (its tab goes away with the browser)."""
+        if self._task:
+            self._task.cancel()
 
-        # Try to start a new chat (dismiss any rate limit dialogs)
-        try:
-            # Look for "new chat" or compose button
-            new_chat_btn = await page.select('[aria-label="New chat"], [data-testid="newChat"]', timeout=2)
-            if new_chat_btn:
-                await new_chat_btn.click()
-                await page.sleep(1)
-        except Exception:
-            pass
 
-        # Select model if specified (and different from default)
-        selected_model = model or DEFAULT_MODEL
-        if selected_model and selected_model != "thinking":
-            try:
-                # The model selector is in the header area, shows "Grok X.X Thinking" with dropdown
-                # Use JavaScript to find and click it more precisely
-                clicked = await page.evaluate('''() => {
-                    // Find the model selector in the header (contains "Grok" and has a chevron/arrow)
-                    const header = document.querySelector('header') || document.body;
-                    const elements = header.querySelectorAll('div, button, span');
-                    for (const el of elements) {
-                        const text = el.innerText || '';
-                        // Look for "Grok" + version number pattern in header area
-                        if (text.match(/Grok\\s+[0-9]/) && text.includes('Thinking')) {
-                            // Make sure it's the clickable dropdown, not a child element
-                            if (el.closest('[aria-haspopup]') || el.querySelector('svg') || text.length < 30) {
-                                el.click();
-                                return true;
-                            }
-                        }
-                    }
-                    return false;
-                }''')
-
-                if clicked:
-                    await page.sleep(1.5)
-
-                    # Find and click the target model in the dropdown
-                    target_model_name = GROK_MODELS.get(selected_model, selected_model)
-
-                    # Use JavaScript to find and click the menu option
-                    await page.evaluate(f'''(targetModel) => {{
-                        const items = document.querySelectorAll('[role="menuitem"], [role="option"], [role="menuitemradio"]');
-                        for (const item of items) {{
-                            if (item.innerText.toLowerCase().includes(targetModel.toLowerCase())) {{
-                                item.click();
-                                return true;
-                            }}
-                        }}
-                        return false;
-                    }}''', target_model_name)
-                    await page.sleep(1)
+# Workers keyed by (headless, profile dir, use_xcom, model)
+_WORKERS: dict = {}
+_WORKERS_LOOP = None
+MAX_WORKERS_PER_KEY = 4
 
-            except Exception as e:
-                # Model selection failed, continue with default
-                pass
 
-        # Find and interact with the input field
-        input_element = None
-        for selector in GROK_INPUT_SELECTORS:
-            try:
-                input_element = await page.select(selector, timeout=5)
-                if input_element:
-                    break
-            except Exception:
-                continue
+def _get_worker(headless: bool, browser_profile: Path, use_xcom: bool, model: str) -> GrokWorker:
+    """
+    Pick a worker for this configuration: an idle one if any, else a new
+    one (up to MAX_WORKERS_PER_KEY tabs), else the least loaded.
+    """
+    global _WORKERS_LOOP
 
-        if not input_element:
-            # Try finding any contenteditable element
-            try:
-                input_element = await page.select('div[contenteditable="true"]', timeout=5)
-            except Exception:
-                pass
+    loop = asyncio.get_running_loop()
+    if _WORKERS_LOOP is not loop:
+        _WORKERS.clear()
+        _WORKERS_LOOP = loop
 
-        if not input_element:
-            # grok.com specific: find input near the placeholder text
-            try:
-                # Use JavaScript to find the input more reliably
-                found = await page.evaluate('''() => {
-                    // Find by placeholder text
-                    const inputs = document.querySelectorAll('input, textarea, [contenteditable="true"]');
-                    for (const input of inputs) {
-                        const placeholder = input.getAttribute('placeholder') || input.getAttribute('data-placeholder') || '';
-                        if (placeholder.toLowerCase().includes('what do you want') ||
-                            placeholder.toLowerCase().includes('ask')) {
-                            input.focus();
-                            return true;
-                        }
-                    }
-                    // Find by nearby text
-                    const textNodes = document.evaluate(
-                        "//text()[contains(., 'What do you want')]",
-                        document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
-                    ).singleNodeValue;
-                    if (textNodes) {
-                        const container = textNodes.parentElement?.closest('[contenteditable], input, textarea');
-                        if (container) {
-                            container.focus();
-                            return true;
-                        }
-                    }
-                    return false;
-                }''')
-                if found:
-                    # Get the focused element
-                    input_element = await page.select(':focus', timeout=2)
-            except Exception:
-                pass
+    workers = _WORKERS.setdefault((headless, str(browser_profile), use_xcom, model), [])
+    for worker in workers:
+        if not worker.load:
+            return worker
+    if len(workers) < MAX_WORKERS_PER_KEY:
+        worker = GrokWorker(headless, browser_profile, use_xcom, model)
+        workers.append(worker)
+        return worker
+    return min(workers, key=lambda w: w.load)
 
-        if not input_element:
-            if screenshot:
-                await page.save_screenshot(screenshot)
-            return {
-                "success": False,
-                "error": "Could not find Grok input field",
-                "screenshot": screenshot
-            }
 
-        # Click the input and type the prompt
-        await input_element.click()
-        await page.sleep(0.5)
+async def prompt_grok(
+    prompt: str,
+    headless: bool = None,
+    timeout: int = None,
+    screenshot: str = None,
+    show_browser: bool = False,
+    raw: bool = False,
+    model: str = None,
+    use_xcom: bool = False,
+    session_id: str = None,
+    stream_cb=None
+) -> dict:
+    """
+    Send a prompt to Grok and get the response.
+
+    Args:
+        prompt: The prompt to send to Grok
+        headless: Run headless (default from config)
+        timeout: Response timeout in seconds
+        screenshot: Path to save screenshot after response
+        show_browser: Show browser window (overrides headless)
+        raw: Return raw response without formatting
+        model: Grok model to use (thinking, grok-2, grok-3)
+        stream_cb: Called with response text as it arrives, one or more
+            complete lines (newline-terminated) at a time. The result
+            still carries the whole response. "streamed" is False if
+            stream_cb raised and streaming stopped early;
+            "stream_rewritten" is True if Grok changed lines after they
+            were passed on (only the lines after them are sent then).
 
-        # Type the prompt
-        await input_element.send_keys(prompt)
-        await page.sleep(1)
+    Returns:
+        dict with response text and metadata
+    """
+    _load_nodriver()
 
-        # Try to submit - first try clicking the submit button, then fallback to Enter
-        submitted = False
-        try:
-            # Find and click submit button (grok.com uses aria-label="Submit")
-            submit_btn = await page.select('button[aria-label="Submit"], button[type="submit"]', timeout=3)
-            if submit_btn:
-                await submit_btn.click()
-                submitted = True
-        except Exception:
-            pass
+    if headless is None:
+        headless = HEADLESS
+    if show_browser:
+        headless = False
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
 
-        if not submitted:
-            # Fallback to pressing Enter
-            await input_element.send_keys("\n")
+    # Determine browser profile directory (unique per session for concurrency)
+    if session_id:
+        browser_profile = USER_DATA_DIR.parent / f"browser_profile_{session_id}"
+        browser_profile.mkdir(exist_ok=True)
+    else:
+        browser_profile = USER_DATA_DIR
 
-        await page.sleep(2)
+    # Hand the prompt to a worker with a warm Grok tab for this setup
+    worker = _get_worker(headless, browser_profile, use_xcom, model or DEFAULT_MODEL)
+    return await worker.submit(prompt, timeout, screenshot, stream_cb)
 
-        # Wait for response - look for "Thought for" indicator first, then get response
-        response_text = None
-        start_time = time.time()
-        last_text = None
-        stable_count = 0
 
-        while time.time() - start_time < timeout:
-            try:
-                # Method 1: Look for response after "Thought for Xs" element
-                # The response appears below the thinking indicator
-                page_text = await page.evaluate('document.body.innerText')
-
-                # Check for rate limit or capacity errors
-                if "reached your limit" in page_text.lower() or "limit of" in page_text:
-                    if screenshot:
-                        await page.save_screenshot(screenshot)
-                    return {
-                        "success": False,
-                        "error": "Rate limit reached (15 Thinking queries/20hrs). Wait for reset or upgrade to Premium+.",
-                        "rate_limited": True,
-                        "hint": "Model switching unavailable while rate limited - the dialog blocks UI interaction.",
-                        "screenshot": screenshot
-                    }
-
-                # Check for grok.com capacity/heavy usage error
-                if "heavy usage" in page_text.lower() or "try again soon" in page_text.lower():
-                    # Try to sign in to get priority access
-                    if using_standalone:
-                        # Click the Sign in button in the capacity error message
-                        try:
-                            sign_in_clicked = await page.evaluate('''() => {
-                                const btns = document.querySelectorAll('button, a');
-                                for (const btn of btns) {
-                                    const text = (btn.innerText || '').trim();
-                                    if (text === 'Sign in') {
-                                        btn.click();
-                                        return true;
-                                    }
-                                }
-                                return false;
-                            }''')
-                            if sign_in_clicked:
-                                await page.sleep(5)
-                                # Check if we're now on sign-in page
-                                current_signin_url = page.url
-                                if "accounts.x.ai" in current_signin_url or "x.com" in current_signin_url:
-                                    # Complete OAuth - look for authorize button
-                                    await page.evaluate('''() => {
-                                        const btns = document.querySelectorAll('button, input[type="submit"]');
-                                        for (const btn of btns) {
-                                            const text = (btn.innerText || btn.value || '').toLowerCase();
-                                            if (text.includes('authorize') || text.includes('allow') ||
-                                                text.includes('sign in') || text.includes('continue')) {
-                                                btn.click();
-                                                return true;
-                                            }
-                                        }
-                                        return false;
-                                    }''')
-                                    await page.sleep(5)
-                                    # If back on grok.com, retry the query
-                                    if "grok.com" in page.url and "sign-in" not in page.url:
-                                        continue  # Retry the response polling
-                        except Exception:
-                            pass
-
-                    if screenshot:
-                        await page.save_screenshot(screenshot)
-                    return {
-                        "success": False,
-                        "error": "Grok is under heavy usage. Sign in for higher priority or try again later.",
-                        "capacity_limited": True,
-                        "hint": "Sign in to grok.com for priority access, or use --xcom flag to use x.com/i/grok instead.",
-                        "screenshot": screenshot
-                    }
-
-                # Check if response is ready
-                # For x.com/i/grok thinking model: look for "Thought for" indicator
-                # For grok.com or other models: look for response content after prompt
-                is_thinking_model = (model or DEFAULT_MODEL) == "thinking"
-                is_standalone = using_standalone
-
-                # Different detection for standalone grok.com vs x.com/i/grok
-                if is_standalone:
-                    # grok.com shows response timing (e.g., "911ms Fast") below response
-                    has_response = prompt in page_text and ('ms' in page_text.lower() or 'fast' in page_text.lower() or 'slow' in page_text.lower())
-                else:
-                    has_response = "Thought for" in page_text if is_thinking_model else (prompt in page_text and len(page_text) > len(prompt) + 100)
-
-                if has_response:
-                    lines = page_text.split('\n')
-
-                    # Find the prompt in the text
-                    prompt_idx = None
-                    for i, line in enumerate(lines):
-                        if prompt in line:
-                            prompt_idx = i
-                            break
+async def prompt_grok_many(prompts, **kwargs) -> list:
+    """
+    Send several prompts one after another on the same warm browser tab.
 
-                    if prompt_idx is not None:
-                        # Response is between the prompt and the action buttons/suggestions
-                        response_lines = []
-
-                        # For grok.com: response appears after prompt, before timing info
-                        # For x.com: response appears after "Thought for" marker
-                        start_idx = prompt_idx + 1
-
-                        # On x.com, skip past "Thought for" line if present
-                        if not is_standalone:
-                            for j in range(prompt_idx + 1, min(prompt_idx + 5, len(lines))):
-                                if "Thought for" in lines[j]:
-                                    start_idx = j + 1
-                                    break
-
-                        for j in range(start_idx, min(start_idx + 30, len(lines))):
-                            line = lines[j].strip()
-
-                            # Skip empty lines at start
-                            if not line and not response_lines:
-                                continue
-
-                            # Stop at timing info (grok.com shows "XXXms", "X.Xs", or "Fast/Slow")
-                            if line.endswith('ms') or line.endswith('s') or line.lower() in ['fast', 'slow', 'medium']:
-                                # Check if it looks like timing
-                                stripped = line.rstrip('ms').rstrip('s').strip()
-                                if stripped.replace('.', '').isdigit():
-                                    break
-                                if line.lower() in ['fast', 'slow', 'medium']:
-                                    break
-                            # Also check for combined timing like "989ms Fast" or "1.3s"
-                            if re.match(r'^[\d.]+m?s(\s+(fast|slow|medium))?$', line.lower()):
-                                break
+    Takes prompt_grok()'s keyword arguments (except prompt), which apply to
+    every prompt. Only the first prompt pays for browser launch and sign-in.
+    Call close_browsers() when done.
 
-                            # Stop at action buttons
-                            if line in ['Copy', 'Share', 'Like', 'Dislike', 'Think Harder', '...']:
-                                break
+    Returns:
+        list of prompt_grok() result dicts, in prompt order
+    """
+    return [await prompt_grok(prompt, **kwargs) for prompt in prompts]
 
-                            # Stop at follow-up suggestions (arrows)
-                            if line.startswith('↳') or line.startswith('→'):
-                                break
 
-                            # Skip very short lines (icons, single chars)
-                            if len(line) <= 2:
-                                continue
+async def prompt_grok_batch(prompts, parallelism: int = 3, **kwargs) -> list:
+    """
+    Send several prompts on up to `parallelism` tabs of one shared browser.
 
-                            # Skip suggestion lines
-                            words = line.split()
-                            if words and len(words) <= 6 and words[0] in ['Famous', 'Other', 'More', 'Tell', 'Show', 'List', 'Give', 'Explain', 'What', 'How', 'Why', 'When', 'Where', 'Who', 'Compare', 'Explore', 'Make', 'Learn']:
-                                break
+    Prompts are started longest first, so the slowest ones aren't left
+    for the end while the other tabs sit idle. parallelism is capped at
+    MAX_WORKERS_PER_KEY tabs, which also keeps clear of Grok's rate
+    limits. Takes prompt_grok()'s keyword arguments (except prompt).
+    Call close_browsers() when done.
 
-                            response_lines.append(line)
+    Returns:
+        list of prompt_grok() result dicts, in prompt order
+    """
+    results = [None] * len(prompts)
+    queue = asyncio.Queue()
+    for i in sorted(range(len(prompts)), key=lambda i: len(prompts[i]), reverse=True):
+        queue.put_nowait(i)
 
-                        if response_lines:
-                            candidate = '\n'.join(response_lines).strip()
-                            if candidate == last_text:
-                                stable_count += 1
-                                if stable_count >= 2:
-                                    response_text = candidate
-                                    break
-                            else:
-                                stable_count = 0
-                                last_text = candidate
-            except Exception:
-                pass
+    # Each runner has at most one prompt in flight, so each gets its own
+    # worker tab (up to MAX_WORKERS_PER_KEY)
+    async def runner():
+        while not queue.empty():
+            i = queue.get_nowait()
+            results[i] = await prompt_grok(prompts[i], **kwargs)
 
-            if response_text:
-                break
+    parallelism = max(1, min(parallelism, MAX_WORKERS_PER_KEY, len(prompts)))
+    await asyncio.gather(*(runner() for _ in range(parallelism)))
+    return results
 
-            await page.sleep(1)
 
-        # Take screenshot if requested
-        if screenshot:
-            await page.save_screenshot(screenshot)
+def ask_server(request: dict, socket_path: Path = GROK_SOCKET, stream_cb=None):
+    """
+    Send a prompt_grok() request to a running daemon (see grokd.py).
+
+    With stream_cb, the daemon streams the response and stream_cb gets
+    each chunk, as for prompt_grok().
+
+    Returns:
+        dict: the result, or None if no server is listening (the caller
+        should then run the prompt itself)
+    """
+    import socket
 
-        if not response_text:
+    if not socket_path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return None
+
+        # Connected: from here on the server owns the prompt, so failures are
+        # reported rather than retried in-process
+        try:
+            sock.sendall(json.dumps({**request, "stream": stream_cb is not None}).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                # Streamed {"chunk": ...} lines come first, then the result
+                for line in f:
+                    message = json.loads(line)
+                    if stream_cb and message.keys() == {"chunk"}:
+                        stream_cb(message["chunk"])
+                    else:
+                        return message
+            raise ValueError("no response")
+        except (OSError, ValueError) as e:
             return {
                 "success": False,
-                "error": "Timeout waiting for Grok response",
-                "screenshot": screenshot
+                "error": f"Lost connection to grokd: {e or 'no response'}"
             }
+    finally:
+        sock.close()
 
-        # Estimate tokens for Claude Code context budget
-        response_tokens = estimate_tokens(response_text)
-        prompt_tokens = estimate_tokens(prompt)
-
-        result = {
-            "success": True,
-            "response": response_text,
-            "prompt": prompt,
-            "cookies_used": injected,
-            "tokens": {
-                "response": response_tokens,
-                "prompt": prompt_tokens,
-                "total": response_tokens + prompt_tokens
-            }
-        }
 
-        if screenshot:
-            result["screenshot"] = screenshot
+# Set once the reader of stdout has gone away (see _write_stdout)
+_STDOUT_CLOSED = False
 
-        return result
 
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
+def _write_stdout(text: str):
+    """Write text to stdout unbuffered; prompt_grok() stream_cb for --raw pipes."""
+    global _STDOUT_CLOSED
+
+    if _STDOUT_CLOSED:
+        return
+    try:
+        sys.stdout.buffer.write(text.encode())
+        sys.stdout.buffer.flush()
+    except BrokenPipeError:
+        # The reader is gone (e.g. `| head`): stop writing, and point stdout
+        # at /dev/null so later prints and the flush at exit don't fail
+        _STDOUT_CLOSED = True
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+
+
+def print_result(result: dict, args, streamed: bool = False) -> int:
+    """Print a prompt_grok() result in the format chosen by args; returns the exit status."""
+    if args.json:
+        # Write straight to stdout rather than building the whole string first;
+        # pretty-print only for a terminal, compact for pipes
+        json.dump(result, sys.stdout, ensure_ascii=False,
+                  indent=2 if sys.stdout.isatty() else None)
+        sys.stdout.write("\n")
+    elif args.tokens:
+        # Token-focused output
+        if result.get("success"):
+            tokens = result.get("tokens", {})
+            print(f"Response: {tokens.get('response', 0)} tokens")
+            print(f"Prompt: {tokens.get('prompt', 0)} tokens")
+            print(f"Total: {tokens.get('total', 0)} tokens")
+            print("---")
+            print(result["response"][:200] + "..." if len(result["response"]) > 200 else result["response"])
+        else:
+            print(f"Error: {result.get('error')}", file=sys.stderr)
+            return 1
+    else:
+        if result.get("success"):
+            if args.raw:
+                # Already written out as it arrived
+                if not streamed:
+                    print(result["response"])
+                elif result.get("stream_rewritten"):
+                    print("Warning: Grok rewrote lines after they were streamed; "
+                          "use --json for the exact response", file=sys.stderr)
+            else:
+                tokens = result.get("tokens", {})
+                print("\n" + "=" * 60)
+                print(f"Prompt: {args.prompt}")
+                print(f"Tokens: ~{tokens.get('total', 0)} (response: {tokens.get('response', 0)})")
+                print("=" * 60)
+                print()
+                print(result["response"])
+                print()
+                print("=" * 60)
+        else:
+            print(f"Error: {result.get('error')}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+def _ask_server_batch(prompts, request: dict, parallelism: int) -> list:
+    """prompt_grok_batch() through a running daemon: one connection per prompt."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    # The daemon has the same MAX_WORKERS_PER_KEY tabs per setup
+    with ThreadPoolExecutor(max(1, min(parallelism, MAX_WORKERS_PER_KEY))) as pool:
+        futures = {
+            i: pool.submit(ask_server, {**request, "prompt": prompts[i]})
+            for i in sorted(range(len(prompts)), key=lambda i: len(prompts[i]), reverse=True)
         }
+    return [
+        futures[i].result() or {"success": False, "error": "grokd stopped before the prompt was sent"}
+        for i in range(len(prompts))
+    ]
 
-    finally:
-        if browser:
-            browser.stop()
+
+def print_batch(results: list, prompts: list, args) -> int:
+    """Print prompt_grok_batch() results in prompt order; returns the exit status."""
+    if args.json:
+        json.dump(results, sys.stdout, ensure_ascii=False,
+                  indent=2 if sys.stdout.isatty() else None)
+        sys.stdout.write("\n")
+        return 0 if all(r.get("success") for r in results) else 1
+
+    status = 0
+    for prompt, result in zip(prompts, results):
+        status |= print_result(result, argparse.Namespace(**{**vars(args), "prompt": prompt}))
+    return status
 
 
 def main():
@@ -790,14 +1551,15 @@ Examples:
   python grok.py --prompt "What is the capital of France?"
   python grok.py --prompt "Explain quantum computing" --timeout 120
   python grok.py --prompt "Hello" --show-browser --screenshot /tmp/grok.png
+  python grok.py --prompts-file prompts.txt --parallel 3 --json
 
 Output:
   By default, prints only the response text.
   Use --json for full JSON output with metadata.
 """
     )
-    parser.add_argument("--prompt", "-p", required=True,
-                        help="The prompt to send to Grok")
+    parser.add_argument("--prompt", "-p",
+                        help="The prompt to send to Grok (required unless --serve/--daemon)")
     parser.add_argument("--timeout", "-t", type=int, default=60,
                         help="Response timeout in seconds (default: 60)")
     parser.add_argument("--thinking", action="store_true",
@@ -820,58 +1582,108 @@ Output:
                         help="Use x.com/i/grok instead of standalone grok.com")
     parser.add_argument("--session-id",
                         help="Unique session ID for concurrent queries (uses separate browser profile)")
+    parser.add_argument("--prompts-file",
+                        help="Send every non-empty line of this file as a prompt, in parallel tabs")
+    parser.add_argument("--parallel", type=int, default=3,
+                        help=f"Tabs to use with --prompts-file (default: 3, at most {MAX_WORKERS_PER_KEY})")
+    parser.add_argument("--serve", action="store_true",
+                        help=f"Run the browser daemon in the foreground, answering other grok.py calls over {GROK_SOCKET}")
+    parser.add_argument("--daemon", choices=["start", "stop", "status"],
+                        help="Start, stop or check the browser daemon in the background")
+    parser.add_argument("--keep-alive", action="store_true",
+                        help="Start the browser daemon if needed and leave it running for later calls")
 
     args = parser.parse_args()
 
+    if args.serve:
+        from grokd import serve
+        try:
+            asyncio.run(serve())
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if args.daemon:
+        from grokd import COMMANDS
+        result = COMMANDS[args.daemon]()
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result.get("success", True) else 1)
+    if not (args.prompt or args.prompts_file):
+        parser.error("--prompt or --prompts-file is required")
+    if args.prompts_file and args.screenshot:
+        parser.error("--screenshot can't be used with --prompts-file")
+    if not 1 <= args.parallel <= MAX_WORKERS_PER_KEY:
+        parser.error(f"--parallel must be between 1 and {MAX_WORKERS_PER_KEY}")
+
     # Apply thinking mode timeout (only for thinking model)
     if args.thinking and args.model == "thinking":
         timeout = 120
     else:
         timeout = args.timeout
 
-    result = asyncio.run(prompt_grok(
-        prompt=args.prompt,
-        timeout=timeout,
-        screenshot=args.screenshot,
-        show_browser=args.show_browser,
-        raw=args.raw,
-        model=args.model,
-        use_xcom=args.xcom,
-        session_id=args.session_id
-    ))
-
-    if args.json:
-        print(json.dumps(result, indent=2))
-    elif args.tokens:
-        # Token-focused output
-        if result.get("success"):
-            tokens = result.get("tokens", {})
-            print(f"Response: {tokens.get('response', 0)} tokens")
-            print(f"Prompt: {tokens.get('prompt', 0)} tokens")
-            print(f"Total: {tokens.get('total', 0)} tokens")
-            print("---")
-            print(result["response"][:200] + "..." if len(result["response"]) > 200 else result["response"])
-        else:
-            print(f"Error: {result.get('error')}", file=sys.stderr)
-            sys.exit(1)
-    else:
-        if result.get("success"):
-            if args.raw:
-                print(result["response"])
-            else:
-                tokens = result.get("tokens", {})
-                print("\n" + "=" * 60)
-                print(f"Prompt: {args.prompt}")
-                print(f"Tokens: ~{tokens.get('total', 0)} (response: {tokens.get('response', 0)})")
-                print("=" * 60)
-                print()
-                print(result["response"])
-                print()
-                print("=" * 60)
-        else:
-            print(f"Error: {result.get('error')}", file=sys.stderr)
+    request = {
+        "prompt": args.prompt,
+        "timeout": timeout,
+        "screenshot": str(Path(args.screenshot).resolve()) if args.screenshot else None,
+        "show_browser": args.show_browser,
+        "raw": args.raw,
+        "model": args.model,
+        "use_xcom": args.xcom,
+        "session_id": args.session_id,
+    }
+
+    if args.keep_alive:
+        from grokd import start
+        started = start()
+        if not started.get("success"):
+            print(f"Error: {started.get('error')}", file=sys.stderr)
             sys.exit(1)
 
+    if args.prompts_file:
+        with open(args.prompts_file, encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+        del request["prompt"]
+
+        from grokd import server_running
+        if server_running():
+            sys.exit(print_batch(_ask_server_batch(prompts, request, args.parallel), prompts, args))
+
+        async def run_batch():
+            try:
+                results = await prompt_grok_batch(prompts, args.parallel, **request)
+                status = print_batch(results, prompts, args)
+                sys.stdout.flush()
+                return status
+            finally:
+                close_browsers()
+
+        sys.exit(asyncio.run(run_batch()))
+
+    # Raw output to a pipe is written as it arrives, so readers
+    # like grep or head see the first lines without waiting for the rest
+    stream_cb = None
+    if args.raw and not (args.json or args.tokens) and not sys.stdout.isatty():
+        sys.stdout.flush()
+        stream_cb = _write_stdout
+
+    # Use the daemon if one is running, else run in-process
+    result = ask_server(request, stream_cb=stream_cb)
+    if result is not None:
+        sys.exit(print_result(result, args, streamed=result.get("streamed", False)))
+
+    async def run():
+        try:
+            result = await prompt_grok(**request, stream_cb=stream_cb)
+            # Print before the browsers are torn down, so callers reading
+            # stdout don't wait on shutdown
+            status = print_result(result, args, streamed=result.get("streamed", False))
+            sys.stdout.flush()
+            return status
+        finally:
+            close_browsers()
+
+    sys.exit(asyncio.run(run()))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Grok daemon - keeps browsers warm and answers grok.py prompts
+over a Unix socket, so each prompt skips browser launch and sign-in
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from config import GROK_SOCKET, GROKD_PID_FILE, GROKD_LOG_FILE
+
+# prompt_grok() arguments a client may send
+SERVE_FIELDS = ("prompt", "timeout", "screenshot", "show_browser", "raw",
+                "model", "use_xcom", "session_id")
+
+# How long start/stop wait for the daemon to come up or go away (seconds)
+START_TIMEOUT = 30
+STOP_TIMEOUT = 10
+
+
+def server_running(socket_path: Path = GROK_SOCKET) -> bool:
+    """True if something is accepting connections on socket_path."""
+    if not socket_path.exists():
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+            return True
+        except OSError:
+            return False
+
+
+async def _serve_client(reader, writer):
+    """Answer one newline-delimited JSON request with prompt_grok's result."""
+    from grok import prompt_grok
+
+    try:
+        line = await reader.readline()
+        if not line:
+            # Closed without a request (e.g. server_running() probing)
+            return
+        try:
+            request = json.loads(line)
+            kwargs = {k: request[k] for k in SERVE_FIELDS if k in request}
+            if request.get("stream"):
+                # Send response text ahead of the result as {"chunk": ...} lines
+                kwargs["stream_cb"] = lambda chunk: writer.write(json.dumps({"chunk": chunk}).encode() + b"\n")
+            result = await prompt_grok(**kwargs)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        writer.write(json.dumps(result).encode() + b"\n")
+        await writer.drain()
+    except ConnectionError:
+        pass  # Client went away; nothing to report to
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: Path = GROK_SOCKET):
+    """
+    Keep browsers warm and answer prompts sent over a Unix socket.
+
+    Each connection carries one JSON request (SERVE_FIELDS) and gets one
+    JSON result back, preceded by {"chunk": ...} lines if the request
+    sets "stream". Requests run concurrently on grok.py's worker pool.
+    Runs until SIGTERM/SIGINT, then stops the browsers.
+    """
+    import asyncio
+    from grok import close_browsers
+
+    if server_running(socket_path):
+        raise RuntimeError(f"grokd is already running on {socket_path}")
+    socket_path.unlink(missing_ok=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    server = await asyncio.start_unix_server(_serve_client, path=str(socket_path))
+    socket_path.chmod(0o600)
+    GROKD_PID_FILE.write_text(str(os.getpid()))
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        close_browsers()
+        socket_path.unlink(missing_ok=True)
+        GROKD_PID_FILE.unlink(missing_ok=True)
+
+
+def _read_pid():
+    """PID of the running daemon from GROKD_PID_FILE, or None."""
+    try:
+        return int(GROKD_PID_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def status() -> dict:
+    """Whether the daemon is up, with its PID and socket."""
+    running = server_running()
+    return {
+        "running": running,
+        "pid": _read_pid() if running else None,
+        "socket": str(GROK_SOCKET),
+    }
+
+
+def start() -> dict:
+    """Start the daemon in the background and wait until it is listening."""
+    if server_running():
+        return {"success": True, **status(), "message": "Already running"}
+
+    grok_script = Path(__file__).parent / "grok.py"
+    with open(GROKD_LOG_FILE, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, str(grok_script), "--serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server_running():
+            return {"success": True, **status()}
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    return {"success": False, "error": f"grokd did not start; see {GROKD_LOG_FILE}"}
+
+
+def stop() -> dict:
+    """Ask the daemon to shut down (SIGTERM) and wait for it to exit."""
+    pid = _read_pid()
+    if pid is None or not server_running():
+        return {"success": True, "running": False, "message": "Not running"}
+
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return {"success": True, "running": False, "message": "Not running"}
+
+    deadline = time.monotonic() + STOP_TIMEOUT
+    while time.monotonic() < deadline:
+        if not GROKD_PID_FILE.exists():
+            return {"success": True, "running": False}
+        time.sleep(0.1)
+    return {"success": False, "error": f"grokd (pid {pid}) did not stop within {STOP_TIMEOUT}s"}
+
+
+COMMANDS = {"start": start, "stop": stop, "status": status}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the Grok browser daemon")
+    parser.add_argument("command", choices=sorted(COMMANDS),
+                        help="start, stop or check the daemon")
+    args = parser.parse_args()
+
+    result = COMMANDS[args.command]()
+    print(json.dumps(result, indent=2))
+    if not result.get("success", True):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,32 +9,40 @@ import sys
 import subprocess
 from pathlib import Path
 
+SKILL_DIR = Path(__file__).resolve().parent.parent
+VENV_DIR = SKILL_DIR / ".venv"
+
 
 def get_venv_python():
     """Get the virtual environment Python executable"""
-    skill_dir = Path(__file__).parent.parent
-    venv_dir = skill_dir / ".venv"
-
     if os.name == 'nt':  # Windows
-        venv_python = venv_dir / "Scripts" / "python.exe"
+        venv_python = VENV_DIR / "Scripts" / "python.exe"
     else:  # Unix/Linux/Mac
-        venv_python = venv_dir / "bin" / "python"
+        venv_python = VENV_DIR / "bin" / "python"
 
     return venv_python
 
 
 def ensure_venv():
     """Ensure virtual environment exists"""
-    skill_dir = Path(__file__).parent.parent
-    venv_dir = skill_dir / ".venv"
-    setup_script = skill_dir / "scripts" / "setup_environment.py"
+    venv_python = get_venv_python()
+
+    # Already checked by a run.py further up this process tree
+    if os.environ.get("GROK_CLI_VENV") == str(VENV_DIR):
+        return venv_python
 
-    # Check if venv exists
-    if not venv_dir.exists():
+    # Set up unless a previous setup finished (it writes the sentinel last)
+    # with the interpreter the venv's python still resolves to
+    try:
+        recorded = (VENV_DIR / ".grok-cli-ready").read_text().split("\n", 1)[0]
+    except OSError:
+        recorded = None
+    if recorded != os.path.realpath(venv_python):
         print("Setting up virtual environment...")
         print("   This may take a moment...")
 
         # Run setup with system Python
+        setup_script = SKILL_DIR / "scripts" / "setup_environment.py"
         result = subprocess.run([sys.executable, str(setup_script)])
         if result.returncode != 0:
             print("Failed to set up environment")
@@ -42,7 +50,9 @@ def ensure_venv():
 
         print("Environment ready!")
 
-    return get_venv_python()
+    # Inherited by the script, so runs it starts skip the checks above
+    os.environ["GROK_CLI_VENV"] = str(VENV_DIR)
+    return venv_python
 
 
 def main():
@@ -51,6 +61,7 @@ def main():
         print("Usage: python run.py <script_name> [args...]")
         print("\nAvailable scripts:")
         print("  grok.py      - Send prompt to Grok and get response")
+        print("  grokd.py     - Start, stop or check the browser daemon")
         print("  chat.py      - Interactive chat mode (TBD)")
         sys.exit(1)
 
@@ -66,8 +77,7 @@ def main():
         script_name += '.py'
 
     # Get script path
-    skill_dir = Path(__file__).parent.parent
-    script_path = skill_dir / "scripts" / script_name
+    script_path = SKILL_DIR / "scripts" / script_name
 
     if not script_path.exists():
         print(f"Script not found: {script_name}")
@@ -79,6 +89,12 @@ def main():
     # Build command
     cmd = [str(venv_python), str(script_path)] + script_args
 
+    # Replace this process with the script rather than running a child
+    # interpreter (Windows has no real exec, so run it there)
+    if os.name != 'nt':
+        sys.stdout.flush()
+        os.execv(cmd[0], cmd)
+
     # Run the script
     try:
         result = subprocess.run(cmd)
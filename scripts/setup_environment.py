@@ -4,36 +4,66 @@ Setup virtual environment for Grok CLI skill
 """
 
 import os
+import shutil
 import subprocess
 import sys
+import venv
 from pathlib import Path
 
+# Written into .venv once setup has finished. Holds the venv interpreter's
+# resolved path (first line) and version; run.py skips setup while the path
+# still matches, so a Python upgrade behind the venv's symlink rebuilds it
+READY_SENTINEL = ".grok-cli-ready"
+
+
+def recorded_interpreter(venv_dir: Path):
+    """Resolved interpreter path recorded by the last finished setup, or None."""
+    try:
+        return (venv_dir / READY_SENTINEL).read_text().split("\n", 1)[0]
+    except OSError:
+        return None
+
 
 def setup_venv():
     """Create and setup virtual environment"""
     skill_dir = Path(__file__).parent.parent
     venv_dir = skill_dir / ".venv"
     requirements_file = skill_dir / "requirements.txt"
+    lock_file = skill_dir / "requirements.lock"
 
-    # Create venv if it doesn't exist
-    if not venv_dir.exists():
-        print(f"Creating virtual environment at {venv_dir}...")
-        subprocess.run([sys.executable, "-m", "venv", str(venv_dir)], check=True)
-
-    # Determine pip path
+    # Determine venv Python path
     if os.name == 'nt':
-        pip_path = venv_dir / "Scripts" / "pip.exe"
+        venv_python = venv_dir / "Scripts" / "python.exe"
     else:
-        pip_path = venv_dir / "bin" / "pip"
+        venv_python = venv_dir / "bin" / "python"
 
-    # Upgrade pip
-    print("Upgrading pip...")
-    subprocess.run([str(pip_path), "install", "--upgrade", "pip"], check=True)
+    # Create venv if it doesn't exist (in-process, no `python -m venv` spawn).
+    # Also rebuilds one whose interpreter is gone or has changed since the
+    # last setup, e.g. after a Python upgrade
+    recorded = recorded_interpreter(venv_dir)
+    if not venv_python.exists() or (recorded and recorded != os.path.realpath(venv_python)):
+        print(f"Creating virtual environment at {venv_dir}...")
+        venv.EnvBuilder(with_pip=True, symlinks=(os.name != 'nt'), clear=True).create(venv_dir)
 
-    # Install requirements
-    if requirements_file.exists():
+    # Install requirements: with uv if it's on PATH (much faster cold
+    # installs), else with pip in a single run. A hash-pinned
+    # requirements.lock is installed as-is, skipping dependency resolution
+    uv = shutil.which("uv")
+    if lock_file.exists():
+        print("Installing locked dependencies...")
+        args = ["--no-deps", "--require-hashes", "-r", str(lock_file)]
+    elif requirements_file.exists():
         print("Installing dependencies...")
-        subprocess.run([str(pip_path), "install", "-r", str(requirements_file)], check=True)
+        args = ["-r", str(requirements_file)] if uv else ["--upgrade", "pip", "-r", str(requirements_file)]
+    else:
+        args = None
+    if args:
+        if uv:
+            cmd = [uv, "pip", "install", "--python", str(venv_python)] + args
+        else:
+            cmd = [str(venv_python), "-m", "pip", "install"] + args
+        env = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK="1", PIP_NO_PYTHON_VERSION_WARNING="1")
+        subprocess.run(cmd, check=True, env=env)
 
     # Create data directories
     data_dir = skill_dir / "data"
@@ -41,6 +71,7 @@ def setup_venv():
     (data_dir / "screenshots").mkdir(exist_ok=True)
     (data_dir / "browser_profile").mkdir(exist_ok=True)
 
+    (venv_dir / READY_SENTINEL).write_text(f"{os.path.realpath(venv_python)}\n{sys.version}\n")
     print("Setup complete!")
     return 0
 
@@ -0,0 +1,64 @@
+"""Tests for the decrypted Chrome cookie cache in grok.py"""
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import chrome_cookies  # noqa: E402
+import grok  # noqa: E402
+
+
+class CookieCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.cookie_db = tmp / "Cookies"
+        self.cookie_db.write_bytes(b"")
+        self.calls = 0
+        now = time.time()
+        self.cookies = [
+            {"name": "auth_token", "value": "a", "expires": now + 30 * 86400},
+            {"name": "session", "value": "b", "expires": None},
+            {"name": "old", "value": "c", "expires": now - 86400},
+        ]
+
+        grok._COOKIE_CACHE.clear()
+        for patcher in (
+            mock.patch.object(chrome_cookies, "CHROME_COOKIE_PATH", self.cookie_db),
+            mock.patch.object(chrome_cookies, "extract_cookies", self._extract),
+            mock.patch.object(grok, "COOKIE_CACHE_FILE", tmp / ".cookie_cache.json"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(grok._COOKIE_CACHE.clear)
+
+    def _extract(self, domains, decrypt=True):
+        self.calls += 1
+        return {"success": True, "cookies": [dict(c) for c in self.cookies], "count": len(self.cookies)}
+
+    def test_expired_cookie_does_not_defeat_cache(self):
+        first = grok._extract_cookies_cached(("x.com", "twitter.com"))
+        self.assertEqual([c["name"] for c in first["cookies"]], ["auth_token", "session"])
+        self.assertEqual(first["count"], 2)
+
+        # In memory
+        self.assertEqual(grok._extract_cookies_cached(("x.com", "twitter.com")), first)
+        # On disk, as a new invocation would see it
+        grok._COOKIE_CACHE.clear()
+        self.assertEqual(grok._extract_cookies_cached(("x.com", "twitter.com")), first)
+        self.assertEqual(self.calls, 1)
+
+    def test_cookie_expiring_later_invalidates_cache(self):
+        grok._extract_cookies_cached(("x.com",))
+        with mock.patch.object(time, "time", return_value=time.time() + 31 * 86400):
+            later = grok._extract_cookies_cached(("x.com",))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual([c["name"] for c in later["cookies"]], ["session"])
+
+
+if __name__ == "__main__":
+    unittest.main()
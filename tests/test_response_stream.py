@@ -0,0 +1,67 @@
+"""Tests for streaming --raw output (grok._ResponseStream, print_result)"""
+
+import argparse
+import contextlib
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import grok  # noqa: E402
+
+
+def _raw_args():
+    return argparse.Namespace(json=False, tokens=False, raw=True, prompt="hi")
+
+
+class ResponseStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.out = io.StringIO()
+        self.stream = grok._ResponseStream(self.out.write)
+
+    def test_growing_text_is_sent_once(self):
+        self.stream.update("Line one\n")
+        self.stream.update("Line one\n")
+        self.stream.update("Line one\nLine two\n")
+        self.stream.finish("Line one\nLine two\nLine three\n")
+        self.assertEqual(self.out.getvalue(), "Line one\nLine two\nLine three\n")
+        self.assertFalse(self.stream.rewritten)
+
+    def test_transient_rewrite_is_skipped(self):
+        self.stream.update("Line one\n")
+        self.stream.update("Line 1\nLine two\n")
+        self.stream.update("Line one\nLine two\n")
+        self.stream.finish("Line one\nLine two\n")
+        self.assertEqual(self.out.getvalue(), "Line one\nLine two\n")
+        self.assertFalse(self.stream.rewritten)
+
+    def test_rewritten_prefix_is_not_printed_twice(self):
+        self.stream.update("Line one\n")
+        self.stream.update("Line one\nLine two\n")
+        self.stream.finish("Line ONE\nLine two\nLine three\n")
+        self.assertTrue(self.stream.rewritten)
+
+        result = {"success": True, "response": "Line ONE\nLine two\nLine three",
+                  "streamed": self.stream.active, "stream_rewritten": self.stream.rewritten}
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(self.out), contextlib.redirect_stderr(stderr):
+            status = grok.print_result(result, _raw_args(), streamed=result["streamed"])
+
+        self.assertEqual(status, 0)
+        lines = self.out.getvalue().splitlines()
+        self.assertEqual(lines, ["Line one", "Line two", "Line three"])
+        self.assertIn("rewrote", stderr.getvalue())
+
+    def test_failing_callback_stops_streaming(self):
+        def broken(chunk):
+            raise BrokenPipeError()
+        stream = grok._ResponseStream(broken)
+        stream.update("Line one\n")
+        stream.finish("Line one\nLine two\n")
+        self.assertFalse(stream.active)
+
+
+if __name__ == "__main__":
+    unittest.main()